@@ -3,102 +3,893 @@ import asyncpg
 import logging
 import uuid
 import asyncio
+import bisect
+import contextlib
+import csv
+import functools
+import gzip
+import io
+import json
+import re
+import tempfile
+import time
 import urllib.parse
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from redbot.core import commands, Config, checks, app_commands
 from redbot.core.bot import Red
+from redbot.core.utils.chat_formatting import box, pagify
 from discord.ext import tasks
 from discord.ui import Button, View, Modal, TextInput
 from discord import Interaction, ButtonStyle, TextStyle
 
 log = logging.getLogger("red.DurkCogs.AccountLinker")
 
-async def get_linking_code_data(pool: asyncpg.Pool, code: uuid.UUID):
-    conn = await pool.acquire()
-    try:
-        query = """
-            SELECT lc.player_id, p.last_seen_user_name, lc.creation_time
+PATRON_EVENT_DEBOUNCE_SECONDS = 5.0
+PATRON_TIER_CACHE_TTL_SECONDS = 600.0
+PATRON_FULL_RECONCILE_SECONDS = 3600.0
+MEMBER_QUERY_CHUNK_SIZE = 100
+LINK_CODE_MAX_AGE = timedelta(days=1)
+REJECTED_CODE_TTL_SECONDS = 900.0
+REJECTED_CODE_CACHE_SIZE = 10000
+LINK_ATTEMPT_BURST = 5
+LINK_ATTEMPT_REFILL_SECONDS = 30.0
+DEFAULT_POOL_MIN_SIZE = 2
+DEFAULT_POOL_MAX_SIZE = 10
+POOL_IDLE_TIMEOUT_SECONDS = 1800.0
+POOL_HEALTH_CHECK_TIMEOUT_SECONDS = 10.0
+POOL_CLOSE_TIMEOUT_SECONDS = 10.0
+POOL_WARMUP_CONCURRENCY = 4
+POOL_WARMUP_TIMEOUT_SECONDS = 15.0
+POOL_ACQUIRE_TIMEOUT_SECONDS = 10.0
+POOL_RETIRED_GRACE_SECONDS = 600.0
+DB_CONNECT_TIMEOUT_SECONDS = 10.0
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_PROBE_INITIAL_DELAY_SECONDS = 5.0
+CIRCUIT_PROBE_MAX_DELAY_SECONDS = 300.0
+DATABASE_UNAVAILABLE_MESSAGE = "The database for this server is currently unavailable. Please try again later."
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.TooManyConnectionsError,
+)
+CONNECTION_LOST_ERRORS = (
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+)
+AUDIT_FLUSH_INTERVAL_SECONDS = 30.0
+AUDIT_QUEUE_MAX_ROWS = 10000
+BULK_LOOKUP_BATCH_SIZE = 1000
+BULK_LOOKUP_PREVIEW_LINES = 20
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_COLUMNS = ("discord_id", "player_id", "last_seen_user_name", "tier_id", "tier_name")
+
+LINK_OK = "linked"
+LINK_NOT_FOUND = "not_found"
+LINK_EXPIRED = "expired"
+
+QUERIES: Dict[str, str] = {
+    "patron_tiers": """
+        SELECT rmc_patron_tiers_id, discord_role, name, priority
+        FROM rmc_patron_tiers
+        ORDER BY priority ASC;
+    """,
+    "linked_accounts": """
+        SELECT la.discord_id, la.player_id, pat.tier_id AS current_tier_id
+        FROM rmc_linked_accounts la
+        JOIN player p ON la.player_id = p.user_id
+        LEFT JOIN rmc_patrons pat ON la.player_id = pat.player_id;
+    """,
+    "linked_accounts_for_members": """
+        SELECT la.discord_id, la.player_id, pat.tier_id AS current_tier_id
+        FROM rmc_linked_accounts la
+        JOIN player p ON la.player_id = p.user_id
+        LEFT JOIN rmc_patrons pat ON la.player_id = pat.player_id
+        WHERE la.discord_id = ANY($1::bigint[]);
+    """,
+    "apply_patron_tiers": """
+        WITH desired AS (
+            SELECT d.player_id, d.tier_id
+            FROM unnest($1::uuid[], $2::int[]) AS d(player_id, tier_id)
+        ),
+        removed AS (
+            DELETE FROM rmc_patrons pat
+            USING desired d
+            WHERE pat.player_id = d.player_id AND d.tier_id IS NULL
+            RETURNING pat.player_id
+        ),
+        upserted AS (
+            INSERT INTO rmc_patrons (player_id, tier_id)
+            SELECT player_id, tier_id FROM desired WHERE tier_id IS NOT NULL
+            ON CONFLICT (player_id) DO UPDATE SET tier_id = EXCLUDED.tier_id
+            WHERE rmc_patrons.tier_id IS DISTINCT FROM EXCLUDED.tier_id
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT
+            (SELECT count(*) FROM upserted WHERE inserted) AS added,
+            (SELECT count(*) FROM upserted WHERE NOT inserted) AS updated,
+            (SELECT count(*) FROM removed) AS removed;
+    """,
+    "link_account": """
+        WITH code AS (
+            SELECT lc.player_id, p.last_seen_user_name, lc.creation_time,
+                   extract(epoch FROM lc.creation_time)::float8 >= $5::float8 AS unexpired
             FROM rmc_linking_codes lc
             JOIN player p ON lc.player_id = p.user_id
-            WHERE lc.code = $1;
-        """
-        return await conn.fetchrow(query, code)
-    finally:
-        await pool.release(conn)
+            WHERE lc.code = $2
+        ),
+        claim AS (
+            SELECT player_id FROM code WHERE unexpired
+        ),
+        previous AS (
+            SELECT la.player_id
+            FROM rmc_linked_accounts la
+            WHERE la.discord_id = $1 AND EXISTS (SELECT 1 FROM claim)
+            FOR UPDATE
+        ),
+        removed_patron AS (
+            DELETE FROM rmc_patrons pat
+            USING previous, claim
+            WHERE pat.player_id = previous.player_id
+              AND (previous.player_id <> claim.player_id OR $3::int IS NULL)
+        ),
+        discord_account AS (
+            INSERT INTO rmc_discord_accounts (rmc_discord_accounts_id)
+            SELECT $1 FROM claim
+            ON CONFLICT (rmc_discord_accounts_id) DO NOTHING
+        ),
+        link AS (
+            INSERT INTO rmc_linked_accounts (discord_id, player_id)
+            SELECT $1, player_id FROM claim
+            ON CONFLICT (discord_id) DO UPDATE SET player_id = EXCLUDED.player_id
+        ),
+        patron AS (
+            INSERT INTO rmc_patrons (player_id, tier_id)
+            SELECT player_id, $3::int FROM claim
+            WHERE $3::int IS NOT NULL
+            ON CONFLICT (player_id) DO UPDATE SET tier_id = EXCLUDED.tier_id
+        ),
+        audit AS (
+            INSERT INTO rmc_linked_accounts_logs (discord_id, player_id, at)
+            SELECT $1, player_id, $4::timestamptz FROM claim
+            WHERE $4::timestamptz IS NOT NULL
+        )
+        SELECT code.player_id, code.last_seen_user_name, code.creation_time, code.unexpired,
+               (SELECT player_id FROM previous) AS previous_player_id
+        FROM code;
+    """,
+    "unlink": """
+        WITH link AS (
+            DELETE FROM rmc_linked_accounts
+            WHERE discord_id = $1
+            RETURNING player_id
+        ),
+        patron AS (
+            DELETE FROM rmc_patrons pat
+            USING link
+            WHERE pat.player_id = link.player_id
+        )
+        SELECT player_id FROM link;
+    """,
+    "check_link": """
+        SELECT p.last_seen_user_name
+        FROM rmc_linked_accounts la
+        JOIN player p ON la.player_id = p.user_id
+        WHERE la.discord_id = $1;
+    """,
+    "check_links": """
+        SELECT la.discord_id, p.last_seen_user_name, t.name AS tier_name
+        FROM rmc_linked_accounts la
+        JOIN player p ON la.player_id = p.user_id
+        LEFT JOIN rmc_patrons pat ON la.player_id = pat.player_id
+        LEFT JOIN rmc_patron_tiers t ON pat.tier_id = t.rmc_patron_tiers_id
+        WHERE la.discord_id = ANY($1::bigint[]);
+    """,
+    "is_linked": "SELECT 1 FROM rmc_linked_accounts WHERE discord_id = $1;",
+    "export_links": """
+        SELECT la.discord_id, la.player_id, p.last_seen_user_name, pat.tier_id, t.name AS tier_name
+        FROM rmc_linked_accounts la
+        JOIN player p ON la.player_id = p.user_id
+        LEFT JOIN rmc_patrons pat ON la.player_id = pat.player_id
+        LEFT JOIN rmc_patron_tiers t ON pat.tier_id = t.rmc_patron_tiers_id
+        ORDER BY la.discord_id;
+    """,
+}
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, in milliseconds."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        elapsed_ms = seconds * 1000
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile, capped at the largest sample."""
+        if not self.count:
+            return 0.0
+        threshold = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return min(LATENCY_BUCKETS_MS[index], self.max_ms) if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class QueryStats:
+    """Per-query latency, row counts and errors for one pool, plus how long callers waited for a connection."""
+
+    def __init__(self):
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.rows: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.pool_wait = LatencyHistogram()
+
+    def record(self, name: str, seconds: float, rows: int):
+        self.latency.setdefault(name, LatencyHistogram()).record(seconds)
+        self.rows[name] = self.rows.get(name, 0) + rows
+
+    def record_error(self, name: str):
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def slowest(self, limit: int) -> List[Tuple[str, LatencyHistogram]]:
+        return sorted(self.latency.items(), key=lambda item: item[1].percentile(0.99), reverse=True)[:limit]
+
+
+def _status_rowcount(status: str) -> int:
+    last = status.rsplit(" ", 1)[-1] if status else ""
+    return int(last) if last.isdigit() else 0
+
+
+class LinkerConnection(asyncpg.Connection):
+    """Pooled connection that runs QUERIES by name and records their timings.
+
+    Every registry query is prepared when the pool opens the connection and kept by name,
+    so later calls skip the parse/describe round trip.
+    """
+
+    __slots__ = ("query_stats", "statements")
+
+    async def prepare_registry(self, stats: QueryStats):
+        self.query_stats = stats
+        self.statements: Dict[str, asyncpg.prepared_stmt.PreparedStatement] = {}
+        for name, query in QUERIES.items():
+            try:
+                self.statements[name] = await self.prepare(query)
+            except asyncpg.PostgresError as e:
+                log.warning(f"Could not prepare query '{name}': {e}")
+
+    async def _statement(self, name: str) -> asyncpg.prepared_stmt.PreparedStatement:
+        statement = self.statements.get(name)
+        if statement is None:
+            statement = self.statements[name] = await self.prepare(QUERIES[name])
+        return statement
+
+    @staticmethod
+    async def _call_statement(statement: asyncpg.prepared_stmt.PreparedStatement, method: str, args: tuple):
+        if method == "execute":
+            await statement.fetch(*args)
+            return statement.get_statusmsg()
+        return await getattr(statement, method)(*args)
+
+    async def _run_named(self, method: str, name: str, args: tuple):
+        started = time.perf_counter()
+        try:
+            try:
+                result = await self._call_statement(await self._statement(name), method, args)
+            except (asyncpg.InvalidCachedStatementError, asyncpg.OutdatedSchemaCacheError):
+                # The schema changed under the prepared statement. Outside a transaction it is
+                # safe to prepare it again and retry, as asyncpg does for its own cache.
+                self.statements.pop(name, None)
+                if self.is_in_transaction():
+                    raise
+                result = await self._call_statement(await self._statement(name), method, args)
+        except Exception:
+            self.query_stats.record_error(name)
+            raise
+        if method == "execute":
+            rows = _status_rowcount(result)
+        elif method == "fetch":
+            rows = len(result)
+        else:
+            rows = 0 if result is None else 1
+        self.query_stats.record(name, time.perf_counter() - started, rows)
+        return result
 
-async def get_discord_link_data(pool: asyncpg.Pool, discord_id: int):
-    conn = await pool.acquire()
-    try:
-        query = """
-            SELECT da.rmc_discord_accounts_id, la.player_id
-            FROM rmc_discord_accounts da
-            LEFT JOIN rmc_linked_accounts la ON da.rmc_discord_accounts_id = la.discord_id
-            WHERE da.rmc_discord_accounts_id = $1;
-        """
-        return await conn.fetchrow(query, discord_id)
-    finally:
-        await pool.release(conn)
+    async def fetch_named(self, name: str, *args) -> List[asyncpg.Record]:
+        return await self._run_named("fetch", name, args)
 
-async def remove_patron_and_link(conn: asyncpg.Connection, player_id: uuid.UUID):
-    await conn.execute('DELETE FROM rmc_patrons WHERE player_id = $1;', player_id)
-    await conn.execute('DELETE FROM rmc_linked_accounts WHERE player_id = $1;', player_id)
+    async def fetchrow_named(self, name: str, *args) -> Optional[asyncpg.Record]:
+        return await self._run_named("fetchrow", name, args)
 
-async def get_patron_tiers(pool: asyncpg.Pool):
-    conn = await pool.acquire()
+    async def fetchval_named(self, name: str, *args):
+        return await self._run_named("fetchval", name, args)
+
+    async def execute_named(self, name: str, *args) -> str:
+        return await self._run_named("execute", name, args)
+
+    async def iterate_named(self, name: str, *args, chunk_size: int) -> AsyncIterator[List[asyncpg.Record]]:
+        """Streams a query through a server-side cursor in chunks. Must be called inside a transaction."""
+        started = time.perf_counter()
+        rows = 0
+        try:
+            cursor = await (await self._statement(name)).cursor(*args)
+            while True:
+                chunk = await cursor.fetch(chunk_size)
+                if not chunk:
+                    break
+                rows += len(chunk)
+                yield chunk
+        except Exception:
+            self.query_stats.record_error(name)
+            raise
+        self.query_stats.record(name, time.perf_counter() - started, rows)
+
+
+async def write_link_logs(conn: LinkerConnection, rows: List[Tuple[int, uuid.UUID, datetime]]):
+    """Bulk-inserts queued (discord_id, player_id, at) rows into rmc_linked_accounts_logs with COPY."""
+    started = time.perf_counter()
+    try:
+        await conn.copy_records_to_table("rmc_linked_accounts_logs", records=rows, columns=["discord_id", "player_id", "at"])
+    except Exception:
+        conn.query_stats.record_error("copy_link_logs")
+        raise
+    conn.query_stats.record("copy_link_logs", time.perf_counter() - started, len(rows))
+
+
+class DatabaseUnavailable(Exception):
+    """Raised instead of touching a database whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Counts consecutive connection failures for one database and opens after too many.
+
+    While open, callers fail fast with DatabaseUnavailable; on_open is called once each time
+    the breaker trips so the owner can start probing the database in the background.
+    """
+
+    __slots__ = ("failures", "is_open", "opened_at", "on_open")
+
+    def __init__(self, on_open: Callable[[], None]):
+        self.failures = 0
+        self.is_open = False
+        self.opened_at: Optional[float] = None
+        self.on_open = on_open
+
+    def check(self):
+        if self.is_open:
+            raise DatabaseUnavailable("Database circuit breaker is open")
+
+    def record_success(self):
+        self.failures = 0
+        self.is_open = False
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if not self.is_open and self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.is_open = True
+            self.opened_at = time.monotonic()
+            self.on_open()
+
+
+# Pools created by GuildPoolManager, mapped to the SharedPool that owns them. Pools replaced by a
+# rebuild or closed by eviction stay mapped for a while, so callers still holding one are redirected.
+POOL_OWNERS: Dict[asyncpg.Pool, "SharedPool"] = {}
+
+
+@contextlib.asynccontextmanager
+async def acquire(pool: asyncpg.Pool):
+    """Acquires a pooled connection, recording how long the caller waited for it.
+
+    Failing to connect, or losing the connection mid-query, counts against the database's
+    circuit breaker, and an open breaker raises DatabaseUnavailable without waiting on the
+    pool. Timing out on a saturated pool and errors from the caller's own code do not count. A pool that was rebuilt or
+    evicted since the caller looked it up is swapped for its owner's current pool. Only an
+    acquire counts as use for idle eviction; looking a pool up does not.
+    """
+    shared = POOL_OWNERS.get(pool)
+    breaker = None
+    if shared is not None:
+        breaker = shared.manager.breaker(shared.dsn)
+        breaker.check()
+        pool = await shared.manager.resolve(shared)
+    started = time.perf_counter()
+    try:
+        try:
+            conn = await pool.acquire(timeout=POOL_ACQUIRE_TIMEOUT_SECONDS)
+        except asyncpg.InterfaceError:
+            # Eviction or a rebuild closed the pool between resolving it and acquiring from it.
+            if shared is None or not pool.is_closing():
+                raise
+            pool = await shared.manager.resolve(shared)
+            conn = await pool.acquire(timeout=POOL_ACQUIRE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # Every connection is busy; the database itself may be fine.
+        raise
+    except CONNECTION_ERRORS:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    owner = POOL_OWNERS.get(pool)
+    if owner is not None:
+        owner.last_used = time.monotonic()
     try:
-        query = 'SELECT rmc_patron_tiers_id, discord_role, name, priority FROM rmc_patron_tiers ORDER BY priority ASC;'
-        return await conn.fetch(query)
+        conn.query_stats.pool_wait.record(time.perf_counter() - started)
+        yield conn
+    except CONNECTION_LOST_ERRORS:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
     finally:
         await pool.release(conn)
+    if breaker is not None:
+        breaker.record_success()
 
-async def perform_linking(pool: asyncpg.Pool, discord_id: int, player_id: uuid.UUID, tier_id: int | None):
-    conn = await pool.acquire()
-    try:
-        async with conn.transaction():
-            await conn.execute("""
-                INSERT INTO rmc_discord_accounts (rmc_discord_accounts_id)
-                VALUES ($1)
-                ON CONFLICT (rmc_discord_accounts_id) DO NOTHING;
-            """, discord_id)
-            await conn.execute("""
-                INSERT INTO rmc_linked_accounts (discord_id, player_id)
-                VALUES ($1, $2);
-            """, discord_id, player_id)
-            if tier_id is not None:
-                await conn.execute("""
-                    INSERT INTO rmc_patrons (player_id, tier_id)
-                    VALUES ($1, $2)
-                    ON CONFLICT (player_id) DO UPDATE SET tier_id = $2;
-                """, player_id, tier_id)
-            await conn.execute("""
-                INSERT INTO rmc_linked_accounts_logs (discord_id, player_id, at)
-                VALUES ($1, $2, $3);
-            """, discord_id, player_id, datetime.now(timezone.utc))
+async def get_patron_tiers(pool: asyncpg.Pool):
+    async with acquire(pool) as conn:
+        return await conn.fetch_named("patron_tiers")
+
+class PatronTiers:
+    """A guild's patron tiers in priority order, indexed by Discord role ID."""
+
+    __slots__ = ("tiers", "by_role", "loaded_at")
+
+    def __init__(self, tiers: List[asyncpg.Record]):
+        self.tiers = list(tiers)
+        self.by_role: Dict[int, Tuple[int, asyncpg.Record]] = {}
+        for rank, tier in enumerate(self.tiers):
+            self.by_role.setdefault(tier["discord_role"], (rank, tier))
+        self.loaded_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.loaded_at < PATRON_TIER_CACHE_TTL_SECONDS
+
+    def match(self, roles) -> Optional[asyncpg.Record]:
+        """Returns the highest-priority tier granted by the given roles, if any."""
+        best = None
+        for role in roles:
+            entry = self.by_role.get(role.id)
+            if entry is not None and (best is None or entry[0] < best[0]):
+                best = entry
+        return best[1] if best else None
+
+class LinkedAccount:
+    """The player and patron tier last written for one linked Discord user."""
+
+    __slots__ = ("player_id", "tier_id")
+
+    def __init__(self, player_id: uuid.UUID, tier_id: Optional[int]):
+        self.player_id = player_id
+        self.tier_id = tier_id
+
+
+class PatronSnapshot:
+    """In-memory copy of a guild's linked accounts, keyed by Discord ID, used to diff role changes without reading the database."""
+
+    __slots__ = ("members", "loaded_at")
+
+    def __init__(self):
+        self.members: Dict[int, LinkedAccount] = {}
+        self.loaded_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > PATRON_FULL_RECONCILE_SECONDS
+
+
+class PatronSyncPlan:
+    """The tier writes a sync pass would make for a set of links, computed without writing.
+
+    Each change is (discord_id, player_id, current_tier_id, desired_tier_id). The snapshot holds
+    every planned link at its desired tier; a reconcile replaces the guild's snapshot with it and
+    a delta pass merges it in once the plan is applied.
+    """
+
+    __slots__ = ("snapshot", "changes", "checked")
+
+    def __init__(self, snapshot: PatronSnapshot, changes: List[Tuple[int, uuid.UUID, Optional[int], Optional[int]]], checked: int):
+        self.snapshot = snapshot
+        self.changes = changes
+        self.checked = checked
+
+    def counts(self) -> Tuple[int, int, int]:
+        """Returns how many changes are (added, updated, removed)."""
+        added = updated = removed = 0
+        for _, _, current, desired in self.changes:
+            if current is None:
+                added += 1
+            elif desired is None:
+                removed += 1
+            else:
+                updated += 1
+        return added, updated, removed
+
+
+class TokenBucket:
+    """Allows a burst of attempts, then one more every refill interval."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self):
+        self.tokens = float(LINK_ATTEMPT_BURST)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(LINK_ATTEMPT_BURST, self.tokens + (now - self.updated) / LINK_ATTEMPT_REFILL_SECONDS)
+        self.updated = now
+
+    def take(self) -> bool:
+        self._refill(time.monotonic())
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
         return True
-    except Exception as e:
-        log.error(f"Error during linking transaction for Discord ID {discord_id}: {e}", exc_info=True)
-        return False
-    finally:
-        await pool.release(conn)
+
+    def retry_after(self) -> float:
+        return max(0.0, (1 - self.tokens) * LINK_ATTEMPT_REFILL_SECONDS)
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= LINK_ATTEMPT_BURST
+
+
+class RejectedCodes:
+    """Recently rejected linking codes per guild, so resubmitting one doesn't reach the database again."""
+
+    __slots__ = ("codes",)
+
+    def __init__(self):
+        self.codes: Dict[Tuple[int, uuid.UUID], Tuple[float, str]] = {}
+
+    def get(self, guild_id: int, code: uuid.UUID) -> Optional[str]:
+        entry = self.codes.get((guild_id, code))
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.codes[(guild_id, code)]
+            return None
+        return entry[1]
+
+    def add(self, guild_id: int, code: uuid.UUID, status: str):
+        self.codes.pop((guild_id, code), None)
+        self.codes[(guild_id, code)] = (time.monotonic() + REJECTED_CODE_TTL_SECONDS, status)
+        while len(self.codes) > REJECTED_CODE_CACHE_SIZE:
+            del self.codes[next(iter(self.codes))]
+
+    def discard_guild(self, guild_id: int):
+        for key in [key for key in self.codes if key[0] == guild_id]:
+            del self.codes[key]
+
+    def evict_expired(self):
+        now = time.monotonic()
+        # Entries share one TTL and are kept in insertion order, so expired ones are at the front.
+        while self.codes:
+            key = next(iter(self.codes))
+            if self.codes[key][0] >= now:
+                break
+            del self.codes[key]
+
+async def apply_patron_tiers(conn: LinkerConnection, player_ids: List[uuid.UUID], tier_ids: List[Optional[int]]) -> Tuple[int, int, int]:
+    """Reconciles rmc_patrons against the desired tier of each given player in a single statement.
+
+    A tier of None removes the player's patron status. Returns (added, updated, removed).
+    """
+    row = await conn.fetchrow_named("apply_patron_tiers", player_ids, tier_ids)
+    return row["added"], row["updated"], row["removed"]
+
+async def perform_linking(pool: asyncpg.Pool, discord_id: int, code: uuid.UUID, tier_id: Optional[int], write_log: bool = True) -> Tuple[str, Optional[asyncpg.Record]]:
+    """Validates a linking code and links it to a Discord user in a single statement.
+
+    The code lookup, expiry check, replacement of any existing link, tier and audit row all run
+    as one round trip in the statement's implicit transaction, so a rejected code costs the same
+    single query as an accepted one. Returns one of LINK_NOT_FOUND, LINK_EXPIRED or LINK_OK,
+    plus the code row (player_id, last_seen_user_name, creation_time, previous_player_id) when
+    the code exists. With write_log=False the caller is responsible for the
+    rmc_linked_accounts_logs row.
+    """
+    now = datetime.now(timezone.utc)
+    async with acquire(pool) as conn:
+        claim = await conn.fetchrow_named(
+            "link_account", discord_id, code, tier_id, now if write_log else None,
+            (now - LINK_CODE_MAX_AGE).timestamp(),
+        )
+    if claim is None:
+        return LINK_NOT_FOUND, None
+    if not claim["unexpired"]:
+        return LINK_EXPIRED, claim
+    return LINK_OK, claim
 
 async def perform_unlinking(pool: asyncpg.Pool, discord_id: int):
-    conn = await pool.acquire()
     try:
-        async with conn.transaction():
-            linked_data = await conn.fetchrow('SELECT player_id FROM rmc_linked_accounts WHERE discord_id = $1;', discord_id)
-            if not linked_data:
-                return False
-            player_id = linked_data["player_id"]
-            await conn.execute('DELETE FROM rmc_patrons WHERE player_id = $1;', player_id)
-            await conn.execute('DELETE FROM rmc_linked_accounts WHERE discord_id = $1;', discord_id)
-        return True
+        async with acquire(pool) as conn:
+            return await conn.fetchval_named("unlink", discord_id) is not None
     except Exception as e:
         log.error(f"Error during unlinking transaction for Discord ID {discord_id}: {e}", exc_info=True)
         return False
-    finally:
-        await pool.release(conn)
+
+class SharedPool:
+    """An asyncpg pool and the guilds currently using it."""
+
+    __slots__ = ("dsn", "pool", "guild_sizes", "stats", "last_used", "rebuilding", "closed", "manager")
+
+    def __init__(self, dsn: str, pool: asyncpg.Pool, guild_sizes: Dict[int, Tuple[int, int]], stats: QueryStats, manager: "GuildPoolManager"):
+        self.dsn = dsn
+        self.pool = pool
+        self.guild_sizes = guild_sizes
+        self.stats = stats
+        self.last_used = time.monotonic()
+        self.rebuilding = False
+        self.closed = False
+        self.manager = manager
+
+    def sizes(self) -> Tuple[int, int]:
+        return pool_sizes(self.guild_sizes)
+
+    def needs_resize(self) -> bool:
+        return self.sizes() != (self.pool.get_min_size(), self.pool.get_max_size())
+
+
+def pool_sizes(guild_sizes: Dict[int, Tuple[int, int]]) -> Tuple[int, int]:
+    """The (min, max) size of a pool shared by guilds with the given settings: the largest of each."""
+    min_size = max((sizes[0] for sizes in guild_sizes.values()), default=DEFAULT_POOL_MIN_SIZE)
+    max_size = max((sizes[1] for sizes in guild_sizes.values()), default=DEFAULT_POOL_MAX_SIZE)
+    return min_size, max(min_size, max_size)
+
+
+class GuildPoolManager:
+    """Owns the database pools for every guild.
+
+    Guilds whose connection strings are identical share one pool, sized for the largest
+    request among them; a guild that attaches with a different requirement triggers a
+    background rebuild at the new size. Pools that go unused for POOL_IDLE_TIMEOUT_SECONDS are closed and
+    broken pools are rebuilt in the background by health_check().
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, SharedPool] = {}
+        self.guild_dsns: Dict[int, str] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retired: Dict[asyncpg.Pool, float] = {}
+        self.closing = False
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    def breaker(self, dsn: str) -> CircuitBreaker:
+        breaker = self.breakers.get(dsn)
+        if breaker is None:
+            breaker = CircuitBreaker(lambda: self._start_probe(dsn))
+            self.breakers[dsn] = breaker
+        return breaker
+
+    def reset_breaker(self, dsn: str):
+        breaker = self.breakers.get(dsn)
+        if breaker is not None:
+            breaker.record_success()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _start_probe(self, dsn: str):
+        log.warning(f"Database circuit breaker opened after {CIRCUIT_FAILURE_THRESHOLD} consecutive failures (Guilds: {self._guilds_for(dsn)}). Failing fast until it recovers.")
+        self._spawn(self._probe(dsn))
+
+    async def _probe(self, dsn: str):
+        """Retries a bare connection with exponential backoff until the database answers again."""
+        breaker = self.breakers[dsn]
+        delay = CIRCUIT_PROBE_INITIAL_DELAY_SECONDS
+        while breaker.is_open:
+            await asyncio.sleep(delay)
+            try:
+                conn = await asyncpg.connect(dsn, timeout=DB_CONNECT_TIMEOUT_SECONDS)
+                try:
+                    await conn.execute("SELECT 1;")
+                finally:
+                    await conn.close()
+            except (asyncpg.PostgresError, *CONNECTION_ERRORS) as e:
+                delay = min(delay * 2, CIRCUIT_PROBE_MAX_DELAY_SECONDS)
+                log.debug(f"Database probe failed (Guilds: {self._guilds_for(dsn)}): {e}. Next attempt in {delay:.0f}s.")
+                continue
+            breaker.record_success()
+            log.info(f"Database reachable again; circuit breaker closed (Guilds: {self._guilds_for(dsn)}).")
+
+    def _guilds_for(self, dsn: str) -> List[int]:
+        return sorted(guild_id for guild_id, guild_dsn in self.guild_dsns.items() if guild_dsn == dsn)
+
+    def get_cached(self, guild_id: int) -> Optional[asyncpg.Pool]:
+        dsn = self.guild_dsns.get(guild_id)
+        shared = self.pools.get(dsn) if dsn else None
+        if shared is None:
+            return None
+        return shared.pool
+
+    async def get(self, guild_id: int, dsn: str, min_size: int, max_size: int) -> asyncpg.Pool:
+        """Returns the pool for a DSN, creating it if needed, and attaches the guild to it.
+
+        Raises DatabaseUnavailable while the DSN's circuit breaker is open.
+        """
+        if self.guild_dsns.get(guild_id, dsn) != dsn:
+            await self.release_guild(guild_id)
+
+        shared = await self._open(dsn, {guild_id: (min_size, max_size)})
+        shared.guild_sizes[guild_id] = (min_size, max_size)
+        shared.last_used = time.monotonic()
+        self.guild_dsns[guild_id] = dsn
+        if shared.needs_resize() and not shared.rebuilding:
+            log.info(f"Resizing shared database pool to {shared.sizes()[0]}-{shared.sizes()[1]} connections (Guilds: {sorted(shared.guild_sizes)}).")
+            shared.rebuilding = True
+            self._spawn(self._rebuild(shared))
+        return shared.pool
+
+    async def _open(self, dsn: str, guild_sizes: Dict[int, Tuple[int, int]]) -> SharedPool:
+        """Returns the SharedPool for a DSN, creating its pool sized for guild_sizes if none is open."""
+        breaker = self.breaker(dsn)
+        breaker.check()
+        shared = self.pools.get(dsn)
+        if shared is None:
+            lock = self.locks.setdefault(dsn, asyncio.Lock())
+            async with lock:
+                breaker.check()
+                shared = self.pools.get(dsn)
+                if shared is None:
+                    stats = QueryStats()
+                    min_size, max_size = pool_sizes(guild_sizes)
+                    try:
+                        pool = await self._create_pool(dsn, min_size, max_size, stats)
+                    except CONNECTION_ERRORS:
+                        breaker.record_failure()
+                        raise
+                    breaker.record_success()
+                    shared = SharedPool(dsn, pool, dict(guild_sizes), stats, self)
+                    self.pools[dsn] = shared
+                    POOL_OWNERS[pool] = shared
+        return shared
+
+    async def resolve(self, shared: SharedPool) -> asyncpg.Pool:
+        """Returns the pool to use in place of one of shared's pools, reopening it if it was evicted.
+
+        Raises DatabaseUnavailable if every guild that used the pool has since been detached from it.
+        """
+        if not shared.closed:
+            return shared.pool
+        current = self.pools.get(shared.dsn)
+        if current is not None:
+            return current.pool
+        guild_sizes = {
+            guild_id: sizes for guild_id, sizes in shared.guild_sizes.items()
+            if self.guild_dsns.get(guild_id, shared.dsn) == shared.dsn
+        }
+        if self.closing or not guild_sizes:
+            raise DatabaseUnavailable("Database pool was closed")
+        reopened = await self._open(shared.dsn, guild_sizes)
+        for guild_id, sizes in guild_sizes.items():
+            reopened.guild_sizes.setdefault(guild_id, sizes)
+            self.guild_dsns[guild_id] = shared.dsn
+        log.info(f"Reopened evicted database pool on use (Guilds: {self._guilds_for(shared.dsn)}).")
+        return reopened.pool
+
+    async def release_guild(self, guild_id: int):
+        """Detaches a guild from its pool, closing the pool if no other guild uses it."""
+        dsn = self.guild_dsns.pop(guild_id, None)
+        shared = self.pools.get(dsn) if dsn else None
+        if shared is None:
+            return
+        shared.guild_sizes.pop(guild_id, None)
+        if not shared.guild_sizes:
+            await self._close(shared)
+
+    async def evict_idle(self, max_idle: float):
+        now = time.monotonic()
+        for pool, retired_at in list(self.retired.items()):
+            if now - retired_at > POOL_RETIRED_GRACE_SECONDS:
+                del self.retired[pool]
+                POOL_OWNERS.pop(pool, None)
+        for shared in list(self.pools.values()):
+            if now - shared.last_used > max_idle and not shared.rebuilding:
+                log.info(f"Closing database pool idle for {now - shared.last_used:.0f}s (Guilds: {sorted(shared.guild_sizes)}).")
+                await self._close(shared)
+
+    async def health_check(self, timeout: float):
+        """Pings every pool and schedules a background rebuild for any that fail."""
+        for shared in list(self.pools.values()):
+            if shared.rebuilding:
+                continue
+            breaker = self.breaker(shared.dsn)
+            if breaker.is_open:
+                continue
+            try:
+                async with shared.pool.acquire(timeout=timeout) as conn:
+                    await conn.execute("SELECT 1;", timeout=timeout)
+            except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError) as e:
+                log.warning(f"Database pool health check failed (Guilds: {sorted(shared.guild_sizes)}): {e}. Rebuilding in the background.")
+                breaker.record_failure()
+                shared.rebuilding = True
+                self._spawn(self._rebuild(shared))
+
+    async def close_all(self):
+        self.closing = True
+        for task in list(self._background_tasks):
+            task.cancel()
+        for shared in list(self.pools.values()):
+            await self._close(shared)
+        for pool in list(self.retired):
+            POOL_OWNERS.pop(pool, None)
+        self.retired.clear()
+
+    def status(self) -> List[SharedPool]:
+        return list(self.pools.values())
+
+    async def _create_pool(self, dsn: str, min_size: int, max_size: int, stats: QueryStats) -> asyncpg.Pool:
+        async def init(conn: LinkerConnection):
+            await conn.prepare_registry(stats)
+
+        pool = await asyncpg.create_pool(
+            dsn,
+            min_size=min_size,
+            max_size=max(min_size, max_size),
+            connection_class=LinkerConnection,
+            init=init,
+            timeout=DB_CONNECT_TIMEOUT_SECONDS,
+        )
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute("SELECT 1;")
+        except BaseException:
+            await pool.close()
+            raise
+        return pool
+
+    async def _rebuild(self, shared: SharedPool):
+        try:
+            min_size, max_size = shared.sizes()
+            new_pool = await self._create_pool(shared.dsn, min_size, max_size, shared.stats)
+        except Exception as e:
+            log.error(f"Failed to rebuild database pool (Guilds: {sorted(shared.guild_sizes)}): {e}")
+            shared.rebuilding = False
+            return
+        old_pool, shared.pool = shared.pool, new_pool
+        POOL_OWNERS[new_pool] = shared
+        shared.rebuilding = False
+        log.info(f"Rebuilt database pool (Guilds: {sorted(shared.guild_sizes)}).")
+        await self._close_pool(old_pool)
+
+    async def _close(self, shared: SharedPool):
+        shared.closed = True
+        if self.pools.get(shared.dsn) is shared:
+            del self.pools[shared.dsn]
+        for guild_id in list(shared.guild_sizes):
+            if self.guild_dsns.get(guild_id) == shared.dsn:
+                del self.guild_dsns[guild_id]
+        await self._close_pool(shared.pool)
+
+    async def _close_pool(self, pool: asyncpg.Pool):
+        self.retired[pool] = time.monotonic()
+        try:
+            await asyncio.wait_for(pool.close(), timeout=POOL_CLOSE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pool.terminate()
 
 class LinkAccountModal(Modal, title="Link SS14 Account"):
     account_code = TextInput(
@@ -115,11 +906,6 @@ class LinkAccountModal(Modal, title="Link SS14 Account"):
         self.guild_id = guild_id
 
     async def on_submit(self, interaction: Interaction):
-        pool = await self.cog.get_pool_for_guild(self.guild_id)
-        if not pool:
-            await interaction.response.send_message("Database connection is not configured for this server. Please contact an admin.", ephemeral=True)
-            return
-
         code_str = self.account_code.value.strip()
         try:
             link_code = uuid.UUID(code_str)
@@ -127,63 +913,70 @@ class LinkAccountModal(Modal, title="Link SS14 Account"):
             await interaction.response.send_message(f"'{code_str}' is not a valid code format. Please get a new one from the game lobby.", ephemeral=True)
             return
 
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        bucket = self.cog.link_attempts.setdefault(interaction.user.id, TokenBucket())
+        if not bucket.take():
+            await interaction.response.send_message(f"You're submitting codes too quickly. Please try again in {bucket.retry_after():.0f} seconds.", ephemeral=True)
+            return
 
-        try:
-            code_data = await get_linking_code_data(pool, link_code)
-            if not code_data:
-                await interaction.followup.send(f"No player found with code `{code_str}`. Please ensure it's correct and hasn't expired.", ephemeral=True)
-                return
-            if code_data["creation_time"].replace(tzinfo=timezone.utc) < datetime.now(timezone.utc) - timedelta(days=1):
-                 await interaction.followup.send(f"Code `{code_str}` was generated too long ago. Please get a new one.", ephemeral=True)
-                 return
+        rejected = self.cog.rejected_codes.get(self.guild_id, link_code)
+        if rejected is not None:
+            await interaction.response.send_message(self.rejection_message(rejected, code_str), ephemeral=True)
+            return
 
-            player_id_to_link = code_data["player_id"]
-            player_name = code_data["last_seen_user_name"]
-            discord_user = interaction.user
+        try:
+            pool = await self.cog.get_pool_for_guild(self.guild_id)
+        except DatabaseUnavailable:
+            await interaction.response.send_message(DATABASE_UNAVAILABLE_MESSAGE, ephemeral=True)
+            return
+        if not pool:
+            await interaction.response.send_message("Database connection is not configured for this server. Please contact an admin.", ephemeral=True)
+            return
 
-            existing_link = await get_discord_link_data(pool, discord_user.id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
 
-            if existing_link and existing_link["player_id"] is not None:
-                existing_player_id = existing_link["player_id"]
-                log.info(f"User {discord_user.id} already linked to player {existing_player_id} in Guild {self.guild_id}. Unlinking previous...")
-                conn = await pool.acquire()
-                try:
-                    async with conn.transaction():
-                        await remove_patron_and_link(conn, existing_player_id)
-                    log.info(f"Successfully unlinked previous account for {discord_user.id} (Player: {existing_player_id}) in Guild {self.guild_id}.")
-                except Exception as e:
-                    log.error(f"Failed to remove previous link for {discord_user.id} (Player: {existing_player_id}) in Guild {self.guild_id}: {e}", exc_info=True)
-                    await interaction.followup.send("Failed to remove your previous account link. Please try again or contact support.", ephemeral=True)
-                    return
-                finally:
-                    await pool.release(conn)
+        try:
+            discord_user = interaction.user
 
             patron_tier_id = None
             highest_priority_tier_name = None
             if isinstance(discord_user, discord.Member):
-                db_tiers = await get_patron_tiers(pool)
-                user_role_ids = {role.id for role in discord_user.roles}
-                for tier in db_tiers:
-                    if tier["discord_role"] in user_role_ids:
-                        patron_tier_id = tier["rmc_patron_tiers_id"]
-                        highest_priority_tier_name = tier["name"]
-                        log.info(f"User {discord_user.id} has patron role for tier {highest_priority_tier_name} (ID: {patron_tier_id}) in Guild {self.guild_id}.")
-                        break
-
-            success = await perform_linking(pool, discord_user.id, player_id_to_link, patron_tier_id)
-
-            if success:
-                msg = f"Successfully linked your Discord account to SS14 account: **{player_name}**"
-                if highest_priority_tier_name:
-                    msg += f" with Patron Tier: **{highest_priority_tier_name}**."
-                else:
-                    msg += "."
-                await interaction.followup.send(msg, ephemeral=True)
-                log.info(f"Successfully linked Discord {discord_user.id} to Player {player_id_to_link} ({player_name}) in Guild {self.guild_id}")
-            else:
+                tier = (await self.cog.get_guild_tiers(self.guild_id, pool)).match(discord_user.roles)
+                if tier is not None:
+                    patron_tier_id = tier["rmc_patron_tiers_id"]
+                    highest_priority_tier_name = tier["name"]
+                    log.info(f"User {discord_user.id} has patron role for tier {highest_priority_tier_name} (ID: {patron_tier_id}) in Guild {self.guild_id}.")
+
+            write_behind = await self.cog.config.guild_from_id(self.guild_id).audit_write_behind()
+            try:
+                status, code_data = await perform_linking(pool, discord_user.id, link_code, patron_tier_id, write_log=not write_behind)
+            except asyncpg.IntegrityConstraintViolationError as e:
+                log.error(f"Error during linking transaction for Discord ID {discord_user.id}: {e}", exc_info=True)
                 await interaction.followup.send("An error occurred while linking your account. Please try again later.", ephemeral=True)
+                return
 
+            if status != LINK_OK:
+                self.cog.rejected_codes.add(self.guild_id, link_code, status)
+                await interaction.followup.send(self.rejection_message(status, code_str), ephemeral=True)
+                return
+
+            player_id_to_link = code_data["player_id"]
+            player_name = code_data["last_seen_user_name"]
+            if code_data["previous_player_id"] is not None:
+                log.info(f"Replaced previous link for {discord_user.id} (Player: {code_data['previous_player_id']}) in Guild {self.guild_id}.")
+
+            msg = f"Successfully linked your Discord account to SS14 account: **{player_name}**"
+            if highest_priority_tier_name:
+                msg += f" with Patron Tier: **{highest_priority_tier_name}**."
+            else:
+                msg += "."
+            self.cog.record_link(self.guild_id, discord_user.id, player_id_to_link, patron_tier_id)
+            if write_behind:
+                self.cog.queue_audit_log(self.guild_id, discord_user.id, player_id_to_link, datetime.now(timezone.utc))
+            await interaction.followup.send(msg, ephemeral=True)
+            log.info(f"Successfully linked Discord {discord_user.id} to Player {player_id_to_link} ({player_name}) in Guild {self.guild_id}")
+
+        except DatabaseUnavailable:
+            await interaction.followup.send(DATABASE_UNAVAILABLE_MESSAGE, ephemeral=True)
         except asyncpg.PostgresError as db_err:
             log.error(f"Database error during linking for {interaction.user.id} in Guild {self.guild_id}: {db_err}", exc_info=True)
             await interaction.followup.send("A database error occurred. Please try again later or contact support.", ephemeral=True)
@@ -191,6 +984,12 @@ class LinkAccountModal(Modal, title="Link SS14 Account"):
             log.error(f"Unexpected error during linking for {interaction.user.id} in Guild {self.guild_id}: {e}", exc_info=True)
             await interaction.followup.send("An unexpected error occurred. Please contact support.", ephemeral=True)
 
+    @staticmethod
+    def rejection_message(status: str, code_str: str) -> str:
+        if status == LINK_EXPIRED:
+            return f"Code `{code_str}` was generated too long ago. Please get a new one."
+        return f"No player found with code `{code_str}`. Please ensure it's correct and hasn't expired."
+
 class DbConfigModal(Modal, title="Database Configuration"):
     db_user = TextInput(label="Database Username", style=TextStyle.short, required=True)
     db_pass = TextInput(label="Database Password", style=TextStyle.short, required=True)
@@ -223,6 +1022,7 @@ class DbConfigModal(Modal, title="Database Configuration"):
         log.info(f"Attempting to set DB string for Guild {self.guild_id} (constructed from modal).")
 
         await self.cog.close_guild_pool(self.guild_id)
+        self.cog.pool_manager.reset_breaker(connection_string)
 
         try:
             await self.cog.config.guild_from_id(self.guild_id).db_connection_string.set(connection_string)
@@ -232,7 +1032,10 @@ class DbConfigModal(Modal, title="Database Configuration"):
             await interaction.followup.send("An error occurred while saving the configuration.", ephemeral=True)
             return
 
-        pool = await self.cog.get_pool_for_guild(self.guild_id)
+        try:
+            pool = await self.cog.get_pool_for_guild(self.guild_id)
+        except DatabaseUnavailable:
+            pool = None
 
         if pool:
             await interaction.followup.send(f"Database connection string saved and successfully tested for this server!", ephemeral=True)
@@ -257,73 +1060,249 @@ class AccountLinker(commands.Cog):
 
     DEFAULT_GUILD = {
         "db_connection_string": None,
+        "tier_notify_channel": None,
+        "pool_min_size": DEFAULT_POOL_MIN_SIZE,
+        "pool_max_size": DEFAULT_POOL_MAX_SIZE,
+        "audit_write_behind": False,
+    }
+
+    DEFAULT_GLOBAL = {
+        "sync_concurrency": 4,
+        "sync_timeout": 120.0,
     }
 
     def __init__(self, bot: Red):
         self.bot = bot
         self.config = Config.get_conf(self, identifier="AccountLinkerMultiDB", force_registration=True)
         self.config.register_guild(**self.DEFAULT_GUILD)
-        self.guild_pools: Dict[int, asyncpg.Pool] = {}
-        self.pool_locks: Dict[int, asyncio.Lock] = {}
+        self.config.register_global(**self.DEFAULT_GLOBAL)
+        self.pool_manager = GuildPoolManager()
+        self.pool_warmup_results: Dict[int, Tuple[float, Optional[str]]] = {}
+        self.patron_sync_results: Dict[int, Tuple[datetime, float, Optional[str]]] = {}
+        self.tier_cache: Dict[int, PatronTiers] = {}
+        self.tier_locks: Dict[int, asyncio.Lock] = {}
+        self.tier_listeners: Dict[int, asyncpg.Connection] = {}
+        self.patron_snapshots: Dict[int, PatronSnapshot] = {}
+        self.audit_queues: Dict[int, List[Tuple[int, uuid.UUID, datetime]]] = {}
+        self.pending_patron_syncs: Dict[int, Set[int]] = {}
+        self.link_attempts: Dict[int, TokenBucket] = {}
+        self.rejected_codes = RejectedCodes()
+        self.patron_sync_event = asyncio.Event()
         self.bot.add_view(LinkAccountView(self))
         self.patron_sync_task.start()
+        self.pool_maintenance_task.start()
+        self.audit_flush_task.start()
+        self.patron_event_worker = asyncio.create_task(self._patron_event_worker())
+        self.pool_warmup_task: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        self.pool_warmup_task = asyncio.create_task(self._warm_up_pools())
+
+    async def _warm_up_pools(self):
+        """Builds the pools for every configured guild concurrently so the first user doesn't pay for it."""
+        try:
+            all_guild_data = await self.config.all_guilds()
+        except Exception as e:
+            log.error(f"Pool warm-up: Failed to retrieve all_guilds config: {e}", exc_info=True)
+            return
+
+        semaphore = asyncio.Semaphore(POOL_WARMUP_CONCURRENCY)
+
+        async def warm_up(guild_id: int, data: dict):
+            async with semaphore:
+                started = time.perf_counter()
+                error = None
+                try:
+                    await asyncio.wait_for(
+                        self.pool_manager.get(guild_id, data["db_connection_string"], data.get("pool_min_size", DEFAULT_POOL_MIN_SIZE), data.get("pool_max_size", DEFAULT_POOL_MAX_SIZE)),
+                        timeout=POOL_WARMUP_TIMEOUT_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    error = f"Timed out after {POOL_WARMUP_TIMEOUT_SECONDS:.0f}s"
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                elapsed = time.perf_counter() - started
+                self.pool_warmup_results[guild_id] = (elapsed, error)
+                if error:
+                    log.warning(f"Pool warm-up: Guild {guild_id} failed after {elapsed:.2f}s: {error}")
+                else:
+                    log.debug(f"Pool warm-up: Guild {guild_id} ready in {elapsed:.2f}s.")
+
+        configured = {guild_id: data for guild_id, data in all_guild_data.items() if data.get("db_connection_string")}
+        if not configured:
+            return
+        started = time.perf_counter()
+        await asyncio.gather(*(warm_up(guild_id, data) for guild_id, data in configured.items()))
+        failures = sum(1 for _, error in self.pool_warmup_results.values() if error)
+        log.info(f"Pool warm-up finished for {len(configured)} guilds in {time.perf_counter() - started:.2f}s ({failures} failed).")
 
     async def get_pool_for_guild(self, guild_id: int) -> Optional[asyncpg.Pool]:
-        if guild_id in self.guild_pools:
-            return self.guild_pools[guild_id]
+        """Returns the guild's pool, or None if it is unconfigured or cannot connect.
 
-        if guild_id not in self.pool_locks:
-            self.pool_locks[guild_id] = asyncio.Lock()
+        Raises DatabaseUnavailable while the guild's database circuit breaker is open.
+        """
+        pool = self.pool_manager.get_cached(guild_id)
+        if pool is not None:
+            return pool
 
-        async with self.pool_locks[guild_id]:
-            if guild_id in self.guild_pools:
-                return self.guild_pools[guild_id]
+        log.debug(f"Attempting to retrieve DB config dict for Guild {guild_id}...")
+        try:
+            guild_data = await self.config.guild_from_id(guild_id).all()
+            conn_string = guild_data.get("db_connection_string")
+        except Exception as e:
+             log.error(f"Error retrieving config dictionary for Guild {guild_id}: {e}", exc_info=True)
+             conn_string = None
+        if not conn_string:
+            log.warning(f"Config dictionary check returned NO database connection string set for Guild {guild_id}.")
+            return None
 
-            log.debug(f"Attempting to retrieve DB config dict for Guild {guild_id}...")
-            try:
-                guild_data = await self.config.guild_from_id(guild_id).all()
-                log.debug(f"Retrieved guild config dict for Guild {guild_id}: {guild_data!r}")
-                conn_string = guild_data.get("db_connection_string")
-            except Exception as e:
-                 log.error(f"Error retrieving config dictionary for Guild {guild_id}: {e}", exc_info=True)
-                 conn_string = None
-            log.debug(f"Value for 'db_connection_string' in Guild {guild_id}: {conn_string!r}")
-            if not conn_string:
-                log.warning(f"Config dictionary check returned NO database connection string set for Guild {guild_id}.")
-                return None
+        try:
+            log.info(f"Getting database connection pool for Guild {guild_id}...")
+            pool = await self.pool_manager.get(guild_id, conn_string, guild_data["pool_min_size"], guild_data["pool_max_size"])
+            log.info(f"Database connection pool established and tested for Guild {guild_id}.")
+            return pool
+        except DatabaseUnavailable:
+            raise
+        except (asyncpg.PostgresError, OSError) as e:
+            log.error(f"Failed to establish database connection pool for Guild {guild_id}: {e}", exc_info=True)
+            return None
+        except Exception as e:
+             log.error(f"Unexpected error during database initialization for Guild {guild_id}: {e}", exc_info=True)
+             return None
+
+    async def _require_pool(self, guild_id: int) -> asyncpg.Pool:
+        """Like get_pool_for_guild, but raises DatabaseUnavailable instead of returning None."""
+        pool = await self.get_pool_for_guild(guild_id)
+        if pool is None:
+            raise DatabaseUnavailable("Could not get a database pool")
+        return pool
+
+    async def get_guild_tiers(self, guild_id: int, pool: asyncpg.Pool) -> PatronTiers:
+        """Returns the cached patron tiers for a guild, reloading them once the TTL has passed."""
+        tiers = self.tier_cache.get(guild_id)
+        if tiers is not None and tiers.is_fresh():
+            return tiers
+
+        lock = self.tier_locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            tiers = self.tier_cache.get(guild_id)
+            if tiers is not None and tiers.is_fresh():
+                return tiers
+            tiers = PatronTiers(await get_patron_tiers(pool))
+            self.tier_cache[guild_id] = tiers
+            log.debug(f"Loaded {len(tiers.tiers)} patron tiers into cache for Guild {guild_id}.")
+
+        await self._ensure_tier_listener(guild_id)
+        return tiers
+
+    def invalidate_tier_cache(self, guild_id: int):
+        if self.tier_cache.pop(guild_id, None) is not None:
+            log.debug(f"Invalidated patron tier cache for Guild {guild_id}.")
+
+    async def _ensure_tier_listener(self, guild_id: int):
+        """Opens a LISTEN connection that invalidates the tier cache, if a notify channel is configured."""
+        if guild_id in self.tier_listeners:
+            return
+        guild_conf = self.config.guild_from_id(guild_id)
+        channel = await guild_conf.tier_notify_channel()
+        conn_string = await guild_conf.db_connection_string()
+        if not channel or not conn_string:
+            return
 
-            try:
-                log.info(f"Creating database connection pool for Guild {guild_id}...")
-                pool = await asyncpg.create_pool(conn_string, min_size=2, max_size=10)
-                async with pool.acquire() as conn:
-                    await conn.execute("SELECT 1;")
-                log.info(f"Database connection pool established and tested for Guild {guild_id}.")
-                self.guild_pools[guild_id] = pool
-                return pool
-            except (asyncpg.PostgresError, OSError) as e:
-                log.error(f"Failed to establish database connection pool for Guild {guild_id}: {e}", exc_info=True)
-                return None
-            except Exception as e:
-                 log.error(f"Unexpected error during database initialization for Guild {guild_id}: {e}", exc_info=True)
-                 return None
+        def on_notify(connection, pid, notify_channel, payload):
+            self.invalidate_tier_cache(guild_id)
+
+        def on_terminate(connection):
+            if self.tier_listeners.get(guild_id) is connection:
+                del self.tier_listeners[guild_id]
+            self.invalidate_tier_cache(guild_id)
+
+        try:
+            conn = await asyncpg.connect(conn_string)
+            await conn.add_listener(channel, on_notify)
+            conn.add_termination_listener(on_terminate)
+        except (asyncpg.PostgresError, OSError) as e:
+            log.error(f"Failed to LISTEN on '{channel}' for patron tier changes in Guild {guild_id}: {e}", exc_info=True)
+            return
+        self.tier_listeners[guild_id] = conn
+        log.info(f"Listening on '{channel}' for patron tier changes in Guild {guild_id}.")
+
+    async def _close_tier_listener(self, guild_id: int):
+        conn = self.tier_listeners.pop(guild_id, None)
+        if conn is not None and not conn.is_closed():
+            await conn.close()
 
     async def close_guild_pool(self, guild_id: int):
-        if guild_id in self.guild_pools:
-            pool = self.guild_pools.pop(guild_id)
-            if pool:
-                await pool.close()
-                log.info(f"Closed database connection pool for Guild {guild_id}.")
-        if guild_id in self.pool_locks:
-            del self.pool_locks[guild_id]
+        self.invalidate_tier_cache(guild_id)
+        self.rejected_codes.discard_guild(guild_id)
+        self.patron_snapshots.pop(guild_id, None)
+        await self._close_tier_listener(guild_id)
+        if guild_id in self.pool_manager.guild_dsns:
+            await self.pool_manager.release_guild(guild_id)
+            log.info(f"Released database connection pool for Guild {guild_id}.")
 
 
     async def cog_unload(self):
+        if self.pool_warmup_task:
+            self.pool_warmup_task.cancel()
         self.patron_sync_task.cancel()
-        guild_ids = list(self.guild_pools.keys())
-        for guild_id in guild_ids:
-            await self.close_guild_pool(guild_id)
+        self.pool_maintenance_task.cancel()
+        self.audit_flush_task.cancel()
+        self.patron_event_worker.cancel()
+        await self.flush_audit_logs()
+        for guild_id, rows in self.audit_queues.items():
+            log.error(f"Dropping {len(rows)} unwritten link log rows for Guild {guild_id} on unload.")
+        await self.pool_manager.close_all()
+        for guild_id in list(self.tier_listeners.keys()):
+            await self._close_tier_listener(guild_id)
         log.info("All guild database connection pools closed.")
 
+    async def cog_command_error(self, ctx: commands.Context, error: commands.CommandError):
+        if isinstance(getattr(error, "original", None), DatabaseUnavailable):
+            await ctx.send(DATABASE_UNAVAILABLE_MESSAGE)
+            return
+        await ctx.bot.on_command_error(ctx, error, unhandled_by_cog=True)
+
+    def queue_audit_log(self, guild_id: int, discord_id: int, player_id: uuid.UUID, at: datetime):
+        self.audit_queues.setdefault(guild_id, []).append((discord_id, player_id, at))
+
+    async def flush_audit_logs(self):
+        """Writes every queued link log row; rows for a guild whose write fails are kept for the next flush."""
+        pending, self.audit_queues = self.audit_queues, {}
+        for guild_id, rows in pending.items():
+            if not rows:
+                continue
+            try:
+                pool = await self.get_pool_for_guild(guild_id)
+                if not pool:
+                    raise RuntimeError("no database pool")
+                async with acquire(pool) as conn:
+                    await write_link_logs(conn, rows)
+                log.debug(f"Flushed {len(rows)} link log rows for Guild {guild_id}.")
+            except Exception as e:
+                requeued = rows + self.audit_queues.get(guild_id, [])
+                if len(requeued) > AUDIT_QUEUE_MAX_ROWS:
+                    log.error(f"Audit log queue for Guild {guild_id} is full; dropping {len(requeued) - AUDIT_QUEUE_MAX_ROWS} oldest rows.")
+                    requeued = requeued[-AUDIT_QUEUE_MAX_ROWS:]
+                self.audit_queues[guild_id] = requeued
+                log.warning(f"Failed to flush {len(rows)} link log rows for Guild {guild_id}, will retry: {e}")
+
+    @tasks.loop(seconds=AUDIT_FLUSH_INTERVAL_SECONDS)
+    async def audit_flush_task(self):
+        await self.flush_audit_logs()
+
+    @tasks.loop(minutes=1.0)
+    async def pool_maintenance_task(self):
+        """Closes idle database pools, rebuilds any that fail a health check and prunes the linking caches."""
+        self.rejected_codes.evict_expired()
+        for user_id in [user_id for user_id, bucket in self.link_attempts.items() if bucket.is_full()]:
+            del self.link_attempts[user_id]
+        try:
+            await self.pool_manager.evict_idle(POOL_IDLE_TIMEOUT_SECONDS)
+            await self.pool_manager.health_check(POOL_HEALTH_CHECK_TIMEOUT_SECONDS)
+        except Exception as e:
+            log.error(f"Pool maintenance task: Unexpected error: {e}", exc_info=True)
+
     @app_commands.command(name="linkersetdb")
     @app_commands.guild_only()
     @app_commands.checks.has_permissions(manage_guild=True)
@@ -353,6 +1332,144 @@ class AccountLinker(commands.Cog):
         except discord.HTTPException: pass
 
 
+    @commands.admin_or_permissions(manage_guild=True)
+    @commands.command()
+    @commands.guild_only()
+    async def linkertiernotify(self, ctx: commands.Context, channel: str = None):
+        """Sets the Postgres NOTIFY channel that signals patron tier changes.
+
+        The database must send `NOTIFY <channel>` whenever `rmc_patron_tiers` changes.
+        Leave the channel empty to rely on the cache TTL alone.
+        """
+        await self.config.guild(ctx.guild).tier_notify_channel.set(channel)
+        await self._close_tier_listener(ctx.guild.id)
+        self.invalidate_tier_cache(ctx.guild.id)
+        if channel:
+            await ctx.send(f"Patron tier cache will be invalidated on `NOTIFY {channel}`.")
+        else:
+            await ctx.send("Patron tier cache will only expire by TTL.")
+
+    @commands.admin_or_permissions(manage_guild=True)
+    @commands.command()
+    @commands.guild_only()
+    async def linkerpoolsize(self, ctx: commands.Context, min_size: int, max_size: int):
+        """Sets the minimum and maximum database connections kept for this server.
+
+        Servers that share a database share one pool, sized for the largest setting among them.
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            await ctx.send("Sizes must satisfy `0 <= min_size <= max_size` and `max_size >= 1`.")
+            return
+        guild_conf = self.config.guild(ctx.guild)
+        await guild_conf.pool_min_size.set(min_size)
+        await guild_conf.pool_max_size.set(max_size)
+        await self.close_guild_pool(ctx.guild.id)
+        await ctx.send(f"Database pool size set to {min_size}-{max_size} connections. It applies the next time this server uses the database; a pool shared with other servers is rebuilt at the largest setting among them.")
+
+    @commands.admin_or_permissions(manage_guild=True)
+    @commands.command()
+    @commands.guild_only()
+    async def linkerauditmode(self, ctx: commands.Context, write_behind: bool):
+        """Toggles write-behind batching of link audit log rows.
+
+        When enabled, `rmc_linked_accounts_logs` rows are queued in memory and written in
+        batches every few seconds instead of inside each link transaction.
+        """
+        await self.config.guild(ctx.guild).audit_write_behind.set(write_behind)
+        if not write_behind:
+            await self.flush_audit_logs()
+        await ctx.send(f"Write-behind link audit logging is now **{'enabled' if write_behind else 'disabled'}**.")
+
+    @commands.admin_or_permissions(manage_guild=True)
+    @commands.command()
+    @commands.guild_only()
+    async def linkerstatus(self, ctx: commands.Context):
+        """Shows the database pool status for this server."""
+        embed = discord.Embed(title="AccountLinker Database Status", color=await ctx.embed_color())
+
+        warmup = self.pool_warmup_results.get(ctx.guild.id)
+        if warmup is None:
+            warmup_str = "*Not warmed up at startup*"
+        elif warmup[1]:
+            warmup_str = f"Failed after {warmup[0]:.2f}s: `{warmup[1]}`"
+        else:
+            warmup_str = f"Ready in {warmup[0]:.2f}s"
+        embed.add_field(name="Startup Warm-up", value=warmup_str, inline=False)
+
+        dsn = self.pool_manager.guild_dsns.get(ctx.guild.id)
+        shared = self.pool_manager.pools.get(dsn) if dsn else None
+        if shared is None:
+            pool_str = "*No open pool*"
+        else:
+            pool = shared.pool
+            pool_str = (
+                f"Connections: {pool.get_size()} open, {pool.get_idle_size()} idle, max {pool.get_max_size()}\n"
+                f"Shared with: {len(shared.guild_sizes) - 1} other server(s)\n"
+                f"Last used: {time.monotonic() - shared.last_used:.0f}s ago"
+            )
+        embed.add_field(name="Pool", value=pool_str, inline=False)
+
+        breaker = self.pool_manager.breakers.get(dsn) if dsn else None
+        if breaker is None or (not breaker.is_open and not breaker.failures):
+            breaker_str = "Closed"
+        elif breaker.is_open:
+            breaker_str = f"**Open** for {time.monotonic() - breaker.opened_at:.0f}s, probing the database in the background"
+        else:
+            breaker_str = f"Closed ({breaker.failures} recent connection failure(s))"
+        embed.add_field(name="Circuit Breaker", value=breaker_str, inline=False)
+
+        sync = self.patron_sync_results.get(ctx.guild.id)
+        if sync is None:
+            sync_str = "*No sync pass has run yet*"
+        else:
+            finished_at, elapsed, outcome = sync
+            sync_str = f"<t:{int(finished_at.timestamp())}:R> in {elapsed:.2f}s: {f'`{outcome}`' if outcome else 'OK'}"
+        embed.add_field(name="Last Patron Sync", value=sync_str, inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.is_owner()
+    @commands.command()
+    async def linkersyncsettings(self, ctx: commands.Context, concurrency: int, timeout: float):
+        """Sets how many guilds the patron sync processes at once and the per-guild timeout in seconds."""
+        if concurrency < 1 or timeout <= 0:
+            await ctx.send("Concurrency must be at least 1 and the timeout must be positive.")
+            return
+        await self.config.sync_concurrency.set(concurrency)
+        await self.config.sync_timeout.set(timeout)
+        await ctx.send(f"Patron sync will process up to {concurrency} guilds at once, {timeout:g}s timeout each.")
+
+    @commands.is_owner()
+    @commands.command()
+    async def linkerqueries(self, ctx: commands.Context, limit: int = 5):
+        """Shows the slowest AccountLinker queries and pool saturation for every open pool."""
+        shared_pools = self.pool_manager.status()
+        if not shared_pools:
+            await ctx.send("No database pools are open.")
+            return
+
+        lines = []
+        for shared in shared_pools:
+            pool = shared.pool
+            stats = shared.stats
+            guild_names = []
+            for guild_id in sorted(shared.guild_sizes):
+                guild = self.bot.get_guild(guild_id)
+                guild_names.append(guild.name if guild else str(guild_id))
+            lines.append(f"[{', '.join(guild_names)}]")
+            lines.append(
+                f"  pool: {pool.get_size() - pool.get_idle_size()}/{pool.get_max_size()} busy, {pool.get_idle_size()} idle"
+                f" | wait p50 {stats.pool_wait.percentile(0.5):g}ms p99 {stats.pool_wait.percentile(0.99):g}ms max {stats.pool_wait.max_ms:.1f}ms"
+            )
+            for name, hist in stats.slowest(limit):
+                lines.append(
+                    f"  {name:<28} n={hist.count:<6} mean {hist.mean_ms:7.1f}ms p50 {hist.percentile(0.5):g}ms"
+                    f" p99 {hist.percentile(0.99):g}ms max {hist.max_ms:.1f}ms rows {stats.rows.get(name, 0)} errors {stats.errors.get(name, 0)}"
+                )
+            lines.append("")
+
+        for page in pagify("\n".join(lines), page_length=1900):
+            await ctx.send(box(page))
+
     @commands.command()
     @commands.guild_only()
     async def checklink(self, ctx: commands.Context, member: discord.Member = None):
@@ -364,15 +1481,9 @@ class AccountLinker(commands.Cog):
 
         target_member = member or ctx.author
 
-        conn = await pool.acquire()
         try:
-            query = """
-                SELECT p.last_seen_user_name
-                FROM rmc_linked_accounts la
-                JOIN player p ON la.player_id = p.user_id
-                WHERE la.discord_id = $1;
-            """
-            result = await conn.fetchrow(query, target_member.id)
+            async with acquire(pool) as conn:
+                result = await conn.fetchrow_named("check_link", target_member.id)
 
             if result:
                 await ctx.send(f"{target_member.mention} is linked to SS14 account: **{result['last_seen_user_name']}**")
@@ -381,10 +1492,183 @@ class AccountLinker(commands.Cog):
         except asyncpg.PostgresError as db_err:
              log.error(f"Database error during checklink for {target_member.id} in Guild {ctx.guild.id}: {db_err}", exc_info=True)
              await ctx.send("A database error occurred while checking the link.", ephemeral=True)
-        finally:
-            await pool.release(conn)
 
 
+    @commands.mod_or_permissions(manage_roles=True)
+    @commands.command()
+    @commands.guild_only()
+    async def checklinks(self, ctx: commands.Context, *, targets: str):
+        """Checks the linked SS14 accounts of every member of a role, or of a list of user IDs/mentions.
+
+        The full result is attached as a CSV file.
+        """
+        pool = await self.get_pool_for_guild(ctx.guild.id)
+        if not pool:
+            await ctx.send("Database connection is not configured for this server.", ephemeral=True)
+            return
+
+        try:
+            role = await commands.RoleConverter().convert(ctx, targets)
+            discord_ids = [member.id for member in role.members]
+            source = f"role {role.name}"
+        except commands.BadArgument:
+            discord_ids = list(dict.fromkeys(int(match) for match in re.findall(r"\d{15,21}", targets)))
+            source = f"{len(discord_ids)} listed users"
+        if not discord_ids:
+            await ctx.send("No members or user IDs found to check.")
+            return
+
+        results: Dict[int, asyncpg.Record] = {}
+        try:
+            async with ctx.typing():
+                async with acquire(pool) as conn:
+                    for start in range(0, len(discord_ids), BULK_LOOKUP_BATCH_SIZE):
+                        batch = discord_ids[start:start + BULK_LOOKUP_BATCH_SIZE]
+                        for row in await conn.fetch_named("check_links", batch):
+                            results[row["discord_id"]] = row
+        except asyncpg.PostgresError as db_err:
+            log.error(f"Database error during checklinks in Guild {ctx.guild.id}: {db_err}", exc_info=True)
+            await ctx.send("A database error occurred while checking links.", ephemeral=True)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["discord_id", "discord_name", "linked", "ss14_username", "patron_tier"])
+        preview = []
+        for discord_id in discord_ids:
+            member = ctx.guild.get_member(discord_id)
+            member_name = str(member) if member else ""
+            row = results.get(discord_id)
+            writer.writerow([discord_id, member_name, bool(row), row["last_seen_user_name"] if row else "", (row["tier_name"] or "") if row else ""])
+            if len(preview) < BULK_LOOKUP_PREVIEW_LINES:
+                if row:
+                    tier = f" ({row['tier_name']})" if row["tier_name"] else ""
+                    preview.append(f"<@{discord_id}> → **{row['last_seen_user_name']}**{tier}")
+                else:
+                    preview.append(f"<@{discord_id}> → *not linked*")
+
+        embed = discord.Embed(
+            title="Bulk Link Check",
+            description="\n".join(preview),
+            color=await ctx.embed_color(),
+        )
+        embed.set_footer(text=f"Checked {len(discord_ids)} users from {source}: {len(results)} linked, {len(discord_ids) - len(results)} not linked.")
+        file = discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename=f"links_{ctx.guild.id}.csv")
+        await ctx.send(embed=embed, file=file, allowed_mentions=discord.AllowedMentions.none())
+
+    @commands.admin_or_permissions(manage_guild=True)
+    @commands.command()
+    @commands.guild_only()
+    async def linkersyncplan(self, ctx: commands.Context):
+        """Shows what a full patron sync would change for this server, without writing anything.
+
+        Every planned change is attached as a CSV file.
+        """
+        pool = await self.get_pool_for_guild(ctx.guild.id)
+        if not pool:
+            await ctx.send("Database connection is not configured for this server.", ephemeral=True)
+            return
+
+        try:
+            async with ctx.typing():
+                tiers = await self.get_guild_tiers(ctx.guild.id, pool)
+                if not tiers.tiers:
+                    await ctx.send("No patron tiers are configured in the database.")
+                    return
+                plan = await self._plan_guild_patrons(ctx.guild, pool, tiers)
+        except asyncpg.PostgresError as db_err:
+            log.error(f"Database error during linkersyncplan in Guild {ctx.guild.id}: {db_err}", exc_info=True)
+            await ctx.send("A database error occurred while planning the sync.", ephemeral=True)
+            return
+
+        tier_names = {tier["rmc_patron_tiers_id"]: tier["name"] for tier in tiers.tiers}
+
+        def tier_label(tier_id: Optional[int]) -> str:
+            if tier_id is None:
+                return ""
+            return tier_names.get(tier_id, f"#{tier_id}")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["action", "discord_id", "player_id", "current_tier", "planned_tier"])
+        preview = []
+        for discord_id, player_id, current_tier_id, desired_tier_id in plan.changes:
+            action = "add" if current_tier_id is None else "remove" if desired_tier_id is None else "update"
+            writer.writerow([action, discord_id, player_id, tier_label(current_tier_id), tier_label(desired_tier_id)])
+            if len(preview) < BULK_LOOKUP_PREVIEW_LINES:
+                preview.append(f"<@{discord_id}>: {tier_label(current_tier_id) or '*none*'} → {tier_label(desired_tier_id) or '*none*'}")
+
+        added, updated, removed = plan.counts()
+        embed = discord.Embed(
+            title="Patron Sync Plan",
+            description="\n".join(preview) or "Nothing to change.",
+            color=await ctx.embed_color(),
+        )
+        embed.set_footer(text=f"Checked {plan.checked} linked accounts: {added} to add, {updated} to update, {removed} to remove.")
+        if not plan.changes:
+            await ctx.send(embed=embed)
+            return
+        file = discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename=f"patron_sync_plan_{ctx.guild.id}.csv")
+        await ctx.send(embed=embed, file=file, allowed_mentions=discord.AllowedMentions.none())
+
+    @commands.admin_or_permissions(manage_guild=True)
+    @commands.command()
+    @commands.guild_only()
+    async def linkerexport(self, ctx: commands.Context, export_format: str = "csv"):
+        """Exports every linked account with its SS14 name and patron tier as a gzipped `csv` or `jsonl` file."""
+        export_format = export_format.lower()
+        if export_format not in ("csv", "jsonl"):
+            await ctx.send("Export format must be `csv` or `jsonl`.")
+            return
+        pool = await self.get_pool_for_guild(ctx.guild.id)
+        if not pool:
+            await ctx.send("Database connection is not configured for this server.", ephemeral=True)
+            return
+
+        row_count = 0
+        with tempfile.TemporaryFile() as raw:
+            try:
+                async with ctx.typing():
+                    with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+                        # Detach even on failure, so the wrapper isn't collected later over the closed GzipFile.
+                        try:
+                            writer = csv.writer(text)
+                            if export_format == "csv":
+                                writer.writerow(EXPORT_COLUMNS)
+                            async with acquire(pool) as conn:
+                                async with conn.transaction(readonly=True):
+                                    async for chunk in conn.iterate_named("export_links", chunk_size=EXPORT_CHUNK_ROWS):
+                                        await asyncio.to_thread(self._write_export_chunk, text, writer, export_format, chunk)
+                                        row_count += len(chunk)
+                            text.flush()
+                        finally:
+                            text.detach()
+            except asyncpg.PostgresError as db_err:
+                log.error(f"Database error during export in Guild {ctx.guild.id}: {db_err}", exc_info=True)
+                await ctx.send("A database error occurred while exporting links.", ephemeral=True)
+                return
+
+            size = raw.tell()
+            if size > ctx.guild.filesize_limit:
+                await ctx.send(f"The export ({row_count} rows, {size / 1_000_000:.1f} MB compressed) is larger than this server's upload limit.")
+                return
+            raw.seek(0)
+            filename = f"linked_accounts_{ctx.guild.id}_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.{export_format}.gz"
+            await ctx.send(f"Exported {row_count} linked accounts.", file=discord.File(raw, filename=filename))
+
+    @staticmethod
+    def _write_export_chunk(text: io.TextIOWrapper, writer, export_format: str, chunk: List[asyncpg.Record]):
+        if export_format == "csv":
+            writer.writerows(
+                (row["discord_id"], row["player_id"], row["last_seen_user_name"], row["tier_id"], row["tier_name"]) for row in chunk
+            )
+        else:
+            for row in chunk:
+                record = {column: row[column] for column in EXPORT_COLUMNS}
+                record["player_id"] = str(record["player_id"])
+                text.write(json.dumps(record) + "\n")
+
     @commands.command()
     @commands.guild_only()
     async def unlinkaccount(self, ctx: commands.Context):
@@ -398,22 +1682,260 @@ class AccountLinker(commands.Cog):
         success = await perform_unlinking(pool, ctx.author.id)
 
         if success:
+            self.forget_link(ctx.guild.id, ctx.author.id)
             await ctx.send("Your SS14 account has been unlinked successfully.", ephemeral=True)
             log.info(f"User {ctx.author.id} successfully unlinked their account in Guild {ctx.guild.id}.")
         else:
-            conn = await pool.acquire()
+            async with acquire(pool) as conn:
+                is_linked = await conn.fetchval_named("is_linked", ctx.author.id)
+            if is_linked:
+                 await ctx.send("An error occurred while trying to unlink your account. Please try again later.", ephemeral=True)
+            else:
+                 await ctx.send("You do not have an SS14 account linked.", ephemeral=True)
+
+    def _snapshots_sharing_database(self, guild_id: int) -> List[PatronSnapshot]:
+        """The snapshots of guild_id and of every guild attached to the same database."""
+        dsn = self.pool_manager.guild_dsns.get(guild_id)
+        guild_ids = {guild_id}
+        if dsn is not None:
+            guild_ids.update(other_id for other_id, other_dsn in self.pool_manager.guild_dsns.items() if other_dsn == dsn)
+        return [self.patron_snapshots[other_id] for other_id in guild_ids if other_id in self.patron_snapshots]
+
+    def record_link(self, guild_id: int, discord_id: int, player_id: uuid.UUID, tier_id: Optional[int]):
+        for snapshot in self._snapshots_sharing_database(guild_id):
+            snapshot.members[discord_id] = LinkedAccount(player_id, tier_id)
+
+    def forget_link(self, guild_id: int, discord_id: int):
+        for snapshot in self._snapshots_sharing_database(guild_id):
+            snapshot.members.pop(discord_id, None)
+
+    async def _resolve_members(self, guild: discord.Guild, discord_ids: Iterable[int]) -> Dict[int, Optional[discord.Member]]:
+        """Resolves Discord IDs to members for one sync pass, fetching cache misses in chunks.
+
+        A value of None means the user is confirmed not to be in the guild. IDs whose lookup
+        failed are left out, so callers can keep their current tier instead of removing it.
+        """
+        resolved: Dict[int, Optional[discord.Member]] = {}
+        missing = []
+        for discord_id in discord_ids:
+            member = guild.get_member(discord_id)
+            if member is not None:
+                resolved[discord_id] = member
+            else:
+                missing.append(discord_id)
+
+        if not missing:
+            return resolved
+        if guild.chunked or not self.bot.intents.members:
+            resolved.update(dict.fromkeys(missing))
+            return resolved
+
+        log.debug(f"Patron sync: Fetching {len(missing)} uncached members for Guild {guild.id}.")
+        for start in range(0, len(missing), MEMBER_QUERY_CHUNK_SIZE):
+            chunk = missing[start:start + MEMBER_QUERY_CHUNK_SIZE]
             try:
-                is_linked = await conn.fetchval('SELECT 1 FROM rmc_linked_accounts WHERE discord_id = $1;', ctx.author.id)
-                if is_linked:
-                     await ctx.send("An error occurred while trying to unlink your account. Please try again later.", ephemeral=True)
-                else:
-                     await ctx.send("You do not have an SS14 account linked.", ephemeral=True)
-            finally:
-                 await pool.release(conn)
+                found = await guild.query_members(user_ids=chunk, limit=len(chunk))
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                log.warning(f"Patron sync: Failed to fetch {len(chunk)} members for Guild {guild.id}: {e}")
+                continue
+            found_by_id = {member.id: member for member in found}
+            for discord_id in chunk:
+                resolved[discord_id] = found_by_id.get(discord_id)
+        return resolved
+
+    @staticmethod
+    def _desired_tier_id(tiers: PatronTiers, member: Optional[discord.Member]) -> Optional[int]:
+        if member is None:
+            return None
+        tier = tiers.match(member.roles)
+        return tier["rmc_patron_tiers_id"] if tier is not None else None
+
+    async def _sync_guild_patrons(self, guild: discord.Guild, get_pool: Callable[[], Awaitable[asyncpg.Pool]],
+                                  discord_ids: Optional[Set[int]] = None) -> Optional[str]:
+        """Synchronizes patron status for a guild's linked accounts, optionally limited to the given Discord IDs.
+
+        Once a guild has a snapshot, passes only write the members whose tier differs from it. The
+        snapshot is rebuilt from the database by a full reconcile every PATRON_FULL_RECONCILE_SECONDS.
+        get_pool is only awaited once the pass has to read or write, so an idle pass on cached
+        tiers leaves the guild's pool free to be evicted. Returns None on success, or a short
+        description of what went wrong.
+        """
+        guild_id = guild.id
+        try:
+            tiers = self.tier_cache.get(guild_id)
+            snapshot = self.patron_snapshots.get(guild_id)
+            reconcile = discord_ids is None and (snapshot is None or snapshot.is_stale())
+            if tiers is None or reconcile:
+                tiers = await self.get_guild_tiers(guild_id, await get_pool())
+            if not tiers.tiers:
+                log.warning(f"Patron sync task: No patron tiers found in database for Guild {guild_id}.")
+                return "No patron tiers configured"
+
+            if reconcile:
+                await self._reconcile_guild_patrons(guild, await get_pool(), tiers)
+            else:
+                await self._sync_patron_deltas(guild, get_pool, tiers, snapshot, discord_ids)
+            return None
+
+        except DatabaseUnavailable:
+            raise
+        except asyncpg.PostgresError as db_err:
+            log.error(f"Patron sync (Guild {guild_id}): Database error: {db_err}", exc_info=True)
+            return f"Database error: {db_err}"
+        except discord.DiscordException as discord_err:
+             log.error(f"Patron sync (Guild {guild_id}): Discord API error: {discord_err}", exc_info=True)
+             return f"Discord API error: {discord_err}"
+        except Exception as e:
+            log.error(f"Patron sync (Guild {guild_id}): Unexpected error: {e}", exc_info=True)
+            return f"Unexpected error: {e}"
+
+    async def _plan_guild_patrons(self, guild: discord.Guild, pool: asyncpg.Pool, tiers: PatronTiers) -> PatronSyncPlan:
+        """Reads the guild's links once and diffs their stored tiers against current roles, without writing."""
+        async with acquire(pool) as conn:
+            linked_accounts = await conn.fetch_named("linked_accounts")
+        links = [(link["discord_id"], LinkedAccount(link["player_id"], link["current_tier_id"])) for link in linked_accounts]
+        return await self._plan_patron_changes(guild, tiers, links)
+
+    async def _plan_patron_changes(self, guild: discord.Guild, tiers: PatronTiers, links: List[Tuple[int, LinkedAccount]]) -> PatronSyncPlan:
+        """Decides the tier of each (discord_id, stored account) link from current roles.
+
+        Used by both the full reconcile and the delta passes, so linkersyncplan previews the same
+        decisions the sync writes. A member whose lookup failed keeps their stored tier.
+        """
+        # Only members who currently hold a tier need a fetch; an uncached member without one stays untiered either way.
+        members = await self._resolve_members(
+            guild, [discord_id for discord_id, account in links if account.tier_id is not None]
+        )
+
+        snapshot = PatronSnapshot()
+        desired_tiers: Dict[uuid.UUID, Optional[int]] = {}
+        current_tiers: Dict[uuid.UUID, Tuple[int, Optional[int]]] = {}
+        for discord_id, account in links:
+            if discord_id in members:
+                tier_id = self._desired_tier_id(tiers, members[discord_id])
+            elif account.tier_id is None:
+                tier_id = self._desired_tier_id(tiers, guild.get_member(discord_id))
+            else:
+                tier_id = account.tier_id
+            snapshot.members[discord_id] = LinkedAccount(account.player_id, tier_id)
+            if desired_tiers.get(account.player_id) is None:
+                desired_tiers[account.player_id] = tier_id
+            current_tiers.setdefault(account.player_id, (discord_id, account.tier_id))
+
+        changes = [
+            (discord_id, player_id, current_tier_id, desired_tiers[player_id])
+            for player_id, (discord_id, current_tier_id) in current_tiers.items()
+            if desired_tiers[player_id] != current_tier_id
+        ]
+        return PatronSyncPlan(snapshot, changes, len(links))
+
+    @staticmethod
+    async def _apply_patron_plan(pool: asyncpg.Pool, plan: PatronSyncPlan) -> Tuple[int, int, int]:
+        if not plan.changes:
+            return 0, 0, 0
+        async with acquire(pool) as conn:
+            return await apply_patron_tiers(
+                conn, [change[1] for change in plan.changes], [change[3] for change in plan.changes]
+            )
+
+    async def _reconcile_guild_patrons(self, guild: discord.Guild, pool: asyncpg.Pool, tiers: PatronTiers):
+        """Rebuilds the guild's snapshot from the database and writes only the tiers the plan changes."""
+        guild_id = guild.id
+        plan = await self._plan_guild_patrons(guild, pool, tiers)
+        added_count, updated_count, removed_count = await self._apply_patron_plan(pool, plan)
+        self.patron_snapshots[guild_id] = plan.snapshot
+        changed_count = added_count + updated_count + removed_count
+
+        if changed_count > 0:
+            log.info(f"Patron reconcile finished for Guild {guild_id}. Processed {plan.checked} linked accounts. DB changes: {changed_count} (Added: {added_count}, Updated: {updated_count}, Removed: {removed_count})")
+        else:
+             log.debug(f"Patron reconcile finished for Guild {guild_id}. Processed {plan.checked} linked accounts. No changes needed.")
+
+    async def _sync_patron_deltas(self, guild: discord.Guild, get_pool: Callable[[], Awaitable[asyncpg.Pool]], tiers: PatronTiers,
+                                  snapshot: Optional[PatronSnapshot], discord_ids: Optional[Set[int]]):
+        """Writes tier changes for members whose roles no longer match their last known tier.
+
+        tiers may be past their TTL. They are only reloaded when the pass finds something to write.
+        """
+        guild_id = guild.id
+        members = snapshot.members if snapshot is not None else {}
+        if discord_ids is None:
+            candidates = list(members.items())
+        else:
+            candidates = [(discord_id, members[discord_id]) for discord_id in discord_ids if discord_id in members]
+            unknown_ids = [discord_id for discord_id in discord_ids if discord_id not in members]
+            if unknown_ids:
+                async with acquire(await get_pool()) as conn:
+                    rows = await conn.fetch_named("linked_accounts_for_members", unknown_ids)
+                candidates.extend((link["discord_id"], LinkedAccount(link["player_id"], link["current_tier_id"])) for link in rows)
+
+        plan = await self._plan_patron_changes(guild, tiers, candidates)
+        if plan.changes and not tiers.is_fresh():
+            tiers = await self.get_guild_tiers(guild_id, await get_pool())
+            plan = await self._plan_patron_changes(guild, tiers, candidates)
+        if not plan.changes:
+            if snapshot is not None:
+                snapshot.members.update(plan.snapshot.members)
+            log.debug(f"Patron sync finished for Guild {guild_id}. Checked {plan.checked} linked accounts. No changes needed.")
+            return
+
+        added_count, updated_count, removed_count = await self._apply_patron_plan(await get_pool(), plan)
+        if snapshot is not None:
+            snapshot.members.update(plan.snapshot.members)
+        changed_count = added_count + updated_count + removed_count
+        log.info(f"Patron sync finished for Guild {guild_id}. Checked {plan.checked} linked accounts, {len(plan.changes)} changed. DB changes: {changed_count} (Added: {added_count}, Updated: {updated_count}, Removed: {removed_count})")
+
+    def _queue_patron_sync(self, guild_id: int, discord_id: int):
+        self.pending_patron_syncs.setdefault(guild_id, set()).add(discord_id)
+        self.patron_sync_event.set()
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles == after.roles or after.bot:
+            return
+        tiers = self.tier_cache.get(after.guild.id)
+        if tiers is not None:
+            changed_role_ids = {role.id for role in before.roles} ^ {role.id for role in after.roles}
+            if changed_role_ids.isdisjoint(tiers.by_role):
+                return
+        self._queue_patron_sync(after.guild.id, after.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        if member.bot:
+            return
+        self._queue_patron_sync(member.guild.id, member.id)
+
+    async def _patron_event_worker(self):
+        """Drains queued role changes after a short debounce and syncs only the affected members."""
+        await self.bot.wait_until_ready()
+        while True:
+            await self.patron_sync_event.wait()
+            await asyncio.sleep(PATRON_EVENT_DEBOUNCE_SECONDS)
+            self.patron_sync_event.clear()
+            pending, self.pending_patron_syncs = self.pending_patron_syncs, {}
+
+            for guild_id, discord_ids in pending.items():
+                try:
+                    if not await self.config.guild_from_id(guild_id).db_connection_string():
+                        continue
+                    guild = self.bot.get_guild(guild_id)
+                    if not guild:
+                        continue
+                    log.debug(f"Patron event sync: Syncing {len(discord_ids)} changed members in Guild {guild_id}.")
+                    await self._sync_guild_patrons(guild, functools.partial(self._require_pool, guild_id), discord_ids)
+                except DatabaseUnavailable as e:
+                    log.debug(f"Patron event sync: Skipping {len(discord_ids)} changed members in Guild {guild_id} ({e}).")
+                except Exception as e:
+                    log.error(f"Patron event sync (Guild {guild_id}): Unexpected error: {e}", exc_info=True)
 
     @tasks.loop(minutes=5.0)
     async def patron_sync_task(self):
-        """Periodically synchronizes patron status based on Discord roles for all configured guilds."""
+        """Periodically synchronizes patron status based on Discord roles for all configured guilds.
+
+        Role changes are normally picked up by the member listeners. This pass diffs each guild's
+        snapshot against current roles and falls back to a full database reconcile once an hour.
+        """
         try:
             all_guild_data = await self.config.all_guilds()
             log.debug(f"Patron sync task: Raw all_guilds data: {all_guild_data!r}")
@@ -438,85 +1960,43 @@ class AccountLinker(commands.Cog):
 
         log.debug(f"Patron sync task running for {len(configured_guild_ids)} configured guilds...")
 
-        for guild_id in configured_guild_ids:
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                log.warning(f"Patron sync task: Skipping configured guild {guild_id} as bot is not currently in it.")
-                continue
-
-            pool = await self.get_pool_for_guild(guild_id)
-            if not pool:
-                log.warning(f"Patron sync task: Skipping guild {guild_id} due to inability to get database pool.")
-                continue
-
-            log.debug(f"Patron sync task: Processing guild {guild.name} ({guild_id}).")
-            conn = None
-            try:
-                conn = await pool.acquire()
-                tiers = await conn.fetch('SELECT rmc_patron_tiers_id, discord_role, name, priority FROM rmc_patron_tiers ORDER BY priority ASC;')
-                if not tiers:
-                    log.warning(f"Patron sync task: No patron tiers found in database for Guild {guild_id}.")
-                    await pool.release(conn)
-                    continue
-
-                linked_accounts = await conn.fetch("""
-                    SELECT la.discord_id, la.player_id, p.last_seen_user_name, pat.tier_id as current_tier_id
-                    FROM rmc_linked_accounts la
-                    JOIN player p ON la.player_id = p.user_id
-                    LEFT JOIN rmc_patrons pat ON la.player_id = pat.player_id;
-                """)
-
-                updated_count = 0
-                removed_count = 0
-                added_count = 0
-
-                for link in linked_accounts:
-                    discord_id = link["discord_id"]
-                    player_id = link["player_id"]
-                    current_db_tier_id = link["current_tier_id"]
-                    player_name = link["last_seen_user_name"]
-
-                    member = guild.get_member(discord_id)
-
-                    highest_priority_role_tier_id = None
-                    highest_priority_role_tier_name = None
-
-                    if member:
-                        user_role_ids = {role.id for role in member.roles}
-                        for tier in tiers:
-                            if tier["discord_role"] in user_role_ids:
-                                highest_priority_role_tier_id = tier["rmc_patron_tiers_id"]
-                                highest_priority_role_tier_name = tier["name"]
-                                break
-
-                    if highest_priority_role_tier_id != current_db_tier_id:
-                        async with conn.transaction():
-                            if current_db_tier_id is not None:
-                                await conn.execute('DELETE FROM rmc_patrons WHERE player_id = $1;', player_id)
-                                removed_count +=1
-                                log.info(f"Patron sync (Guild {guild_id}): Removed patron status for {player_name} ({player_id}) / Discord {discord_id}. Reason: Role changed or user left guild.")
-                            if highest_priority_role_tier_id is not None:
-                                await conn.execute("""
-                                    INSERT INTO rmc_patrons (player_id, tier_id) VALUES ($1, $2);
-                                """, player_id, highest_priority_role_tier_id)
-                                added_count +=1
-                                log.info(f"Patron sync (Guild {guild_id}): Added/Updated patron status for {player_name} ({player_id}) / Discord {discord_id} to tier {highest_priority_role_tier_name} (ID: {highest_priority_role_tier_id}).")
-                        updated_count +=1
-
-                if updated_count > 0:
-                    log.info(f"Patron sync task finished for Guild {guild_id}. Processed {len(linked_accounts)} linked accounts. DB changes: {updated_count} (Added: {added_count}, Removed: {removed_count})")
-                else:
-                     log.debug(f"Patron sync task finished for Guild {guild_id}. Processed {len(linked_accounts)} linked accounts. No changes needed.")
-
-            except asyncpg.PostgresError as db_err:
-                log.error(f"Patron sync task (Guild {guild_id}): Database error: {db_err}", exc_info=True)
-            except discord.DiscordException as discord_err:
-                 log.error(f"Patron sync task (Guild {guild_id}): Discord API error: {discord_err}", exc_info=True)
-            except Exception as e:
-                log.error(f"Patron sync task (Guild {guild_id}): Unexpected error: {e}", exc_info=True)
-            finally:
-                if conn:
-                    await pool.release(conn)
+        sync_settings = await self.config.all()
+        semaphore = asyncio.Semaphore(max(1, sync_settings["sync_concurrency"]))
+        timeout = sync_settings["sync_timeout"]
+
+        async def sync_guild(guild_id: int):
+            async with semaphore:
+                started = time.perf_counter()
+                outcome = await self._run_guild_sync(guild_id, timeout)
+                elapsed = time.perf_counter() - started
+                self.patron_sync_results[guild_id] = (datetime.now(timezone.utc), elapsed, outcome)
+                log.debug(f"Patron sync task: Guild {guild_id} finished in {elapsed:.2f}s ({outcome or 'OK'}).")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sync_guild(guild_id) for guild_id in configured_guild_ids))
+        log.debug(f"Patron sync task finished {len(configured_guild_ids)} guilds in {time.perf_counter() - started:.2f}s.")
+
+    async def _run_guild_sync(self, guild_id: int, timeout: float) -> Optional[str]:
+        """Runs one guild's sync pass under a timeout so a slow database can't hold up other guilds."""
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            log.warning(f"Patron sync task: Skipping configured guild {guild_id} as bot is not currently in it.")
+            return "Bot is not in this server"
+
+        log.debug(f"Patron sync task: Processing guild {guild.name} ({guild_id}).")
+        try:
+            return await asyncio.wait_for(
+                self._sync_guild_patrons(guild, functools.partial(self._require_pool, guild_id)), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            log.error(f"Patron sync task (Guild {guild_id}): Timed out after {timeout}s.")
+            return f"Timed out after {timeout}s"
+        except DatabaseUnavailable as e:
+            log.debug(f"Patron sync task: Skipping guild {guild_id} ({e}).")
+            return f"Database unavailable: {e}"
+        except Exception as e:
+            log.error(f"Patron sync task (Guild {guild_id}): Unexpected error: {e}", exc_info=True)
+            return f"Unexpected error: {e}"
 
     @patron_sync_task.before_loop
     async def before_patron_sync_task(self):
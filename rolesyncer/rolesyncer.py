@@ -1,13 +1,80 @@
 import discord
 from redbot.core import commands, Config, checks
 from redbot.core.bot import Red
+import asyncio
 import logging
-from typing import Set, Optional, Dict, Any
+import time
+from typing import Set, Optional, Dict, Any, List, Tuple
 
 log = logging.getLogger("red.durk-cogs.rolesyncer")
 
 SyncGroups = Dict[str, Dict[str, Any]]
 
+# Subcommands that change sync_groups or enabled; the in-memory index is rebuilt after each of them.
+CONFIG_COMMANDS = frozenset({"create", "delete", "setmaster", "addslave", "removeslave", "addrole", "removerole", "toggle", "singleedit"})
+
+class SyncGroup:
+    """A fully configured sync group as used by the listeners, with its role names precomputed."""
+
+    __slots__ = ("name", "master", "slaves", "roles")
+
+    def __init__(self, name: str, master: int, slaves: Tuple[int, ...], roles: frozenset):
+        self.name = name
+        self.master = master
+        self.slaves = slaves
+        self.roles = roles
+
+FORCESYNC_GUILD_CONCURRENCY = 4
+FORCESYNC_PROGRESS_INTERVAL_SECONDS = 5.0
+FORCESYNC_PLAN_YIELD_EVERY = 1000
+FORCESYNC_CHECKPOINT_EVERY = 200
+ROLE_CHANGE_DEBOUNCE_SECONDS = 2.0
+ROLE_CHANGE_MAX_DELAY_SECONDS = 10.0
+ROLE_CHANGE_FLUSH_TIMEOUT_SECONDS = 30.0
+
+class PendingRoleChange:
+    """A master member's queued role change: their role names before the first event, and when to apply it.
+
+    Each further event pushes the deadline back by the debounce window, up to a cap after the first one.
+    """
+
+    __slots__ = ("before_names", "first_seen", "due")
+
+    def __init__(self, before_names: frozenset, first_seen: float):
+        self.before_names = before_names
+        self.first_seen = first_seen
+        self.due = first_seen + ROLE_CHANGE_DEBOUNCE_SECONDS
+
+class PlannedSync:
+    """One slave member's merged role changes in a force sync plan."""
+
+    __slots__ = ("master_member", "to_add", "to_remove", "allowed")
+
+    def __init__(self, master_member: discord.Member, to_add: Set[str], to_remove: Set[str], allowed: Set[str]):
+        self.master_member = master_member
+        self.to_add = to_add
+        self.to_remove = to_remove
+        self.allowed = allowed
+
+class ForceSyncRun:
+    """Progress of a running force sync: the per-slave-guild queues and how far through them it is.
+
+    last_processed maps each slave guild ID to the highest member ID handled so far; queues run
+    in member ID order, so that is all a checkpoint needs to resume.
+    """
+
+    def __init__(self, message: discord.Message, group_name: Optional[str], resume_after: Dict[int, int]):
+        self.message = message
+        self.group_name = group_name
+        self.last_processed: Dict[int, int] = dict(resume_after)
+        self.cancelled = False
+        self.queues: Dict[discord.Guild, List[PlannedSync]] = {}
+        self.semaphore = asyncio.Semaphore(FORCESYNC_GUILD_CONCURRENCY)
+        self.total = 0
+        self.processed = 0
+        self.actions = 0
+        self.started = time.monotonic()
+
 class RoleSyncer(commands.Cog):
     """Cog for syncing specific roles unidirectionally from a master server to slave servers."""
 
@@ -16,9 +83,51 @@ class RoleSyncer(commands.Cog):
         self.config = Config.get_conf(self, identifier="rolesync")
         default_global = {
             "sync_groups": {},
-            "enabled": True
+            "enabled": True,
+            "single_edit": False,
+            "forcesync_checkpoint": None
         }
         self.config.register_global(**default_global)
+        self.enabled = False
+        self.single_edit = False
+        self.groups_by_master: Dict[int, List[SyncGroup]] = {}
+        self.role_indexes: Dict[int, Dict[str, discord.Role]] = {}
+        self.forcesync_run: Optional[ForceSyncRun] = None
+        self.pending_role_changes: Dict[Tuple[int, int], PendingRoleChange] = {}
+        self.role_change_event = asyncio.Event()
+        self.role_change_worker: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        await self._rebuild_index()
+        self.role_change_worker = asyncio.create_task(self._role_change_worker())
+
+    async def cog_unload(self):
+        if self.role_change_worker is not None:
+            self.role_change_worker.cancel()
+        await self._flush_role_changes()
+        if self.forcesync_run is not None:
+            self.forcesync_run.cancelled = True
+            await self._save_forcesync_checkpoint(self.forcesync_run)
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        if ctx.command.full_parent_name == "rolesync" and ctx.command.name in CONFIG_COMMANDS:
+            await self._rebuild_index()
+
+    async def _rebuild_index(self):
+        """Reloads the master guild ID -> groups index from config, skipping groups that can't sync anything."""
+        all_groups: SyncGroups = await self.config.sync_groups()
+        index: Dict[int, List[SyncGroup]] = {}
+        for g_name, g_data in all_groups.items():
+            master_id = g_data.get("master")
+            slave_ids = tuple(g_data.get("slaves", []))
+            allowed_roles = frozenset(g_data.get("roles", []))
+            if not master_id or not slave_ids or not allowed_roles:
+                continue
+            index.setdefault(master_id, []).append(SyncGroup(g_name, master_id, slave_ids, allowed_roles))
+        self.groups_by_master = index
+        self.enabled = await self.config.enabled()
+        self.single_edit = await self.config.single_edit()
+        log.debug(f"RoleSync: Indexed {sum(len(groups) for groups in index.values())} sync groups across {len(index)} master servers.")
 
     @commands.group()
     @checks.admin_or_permissions(administrator=True)
@@ -217,19 +326,88 @@ class RoleSyncer(commands.Cog):
         embed = discord.Embed(title="Role Synchronization Toggled", description=f"Role synchronization is now globally **{status}**.", color=discord.Color.green())
         await ctx.send(embed=embed)
 
-    @rolesync.command(name="forcesync")
+    @rolesync.command(name="singleedit")
+    async def rolesync_singleedit(self, ctx: commands.Context):
+        """Toggles applying each member's role changes in one edit instead of separate add and remove calls.
+
+        Halves the API calls when a member gains and loses synced roles at once, which matters most for forcesync.
+        """
+        current_status = await self.config.single_edit()
+        await self.config.single_edit.set(not current_status)
+        status = "one role edit per member" if not current_status else "separate add and remove calls"
+        embed = discord.Embed(title="Role Edit Mode Changed", description=f"Role synchronization now uses **{status}**.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    @rolesync.group(name="forcesync", invoke_without_command=True)
     @checks.admin_or_permissions(administrator=True)
     async def rolesync_forcesync(self, ctx: commands.Context, group_name: Optional[str] = None):
         """Forces sync from master to slaves for configured roles.
 
         Optionally specify a group name to sync only that group.
+        Progress is checkpointed, so an interrupted run can be continued with `forcesync resume`.
+        While an interrupted run's checkpoint is saved, resume it or drop it with `forcesync discard` first.
         """
+        checkpoint = await self.config.forcesync_checkpoint()
+        if checkpoint and self.forcesync_run is None:
+            target = f"group '{checkpoint['group']}'" if checkpoint["group"] else "all groups"
+            embed = discord.Embed(
+                title="Error",
+                description=(
+                    f"An interrupted force sync of {target} has a saved checkpoint, and starting a new one would overwrite it.\n"
+                    f"Use `{ctx.prefix}rolesync forcesync resume` to continue it, or `{ctx.prefix}rolesync forcesync discard` to drop it."
+                ),
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        await self._start_forcesync(ctx, group_name, {})
+
+    @rolesync_forcesync.command(name="resume")
+    async def rolesync_forcesync_resume(self, ctx: commands.Context):
+        """Continues an interrupted or cancelled force sync from its last checkpoint."""
+        checkpoint = await self.config.forcesync_checkpoint()
+        if not checkpoint:
+            embed = discord.Embed(title="Error", description="There is no interrupted force sync to resume.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        resume_after = {int(slave_id): member_id for slave_id, member_id in checkpoint["slaves"].items()}
+        await self._start_forcesync(ctx, checkpoint["group"], resume_after)
+
+    @rolesync_forcesync.command(name="cancel")
+    async def rolesync_forcesync_cancel(self, ctx: commands.Context):
+        """Stops the running force sync after the member edits in flight. It can be resumed later."""
+        run = self.forcesync_run
+        if run is None:
+            embed = discord.Embed(title="Error", description="No force sync is running.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        run.cancelled = True
+        embed = discord.Embed(title="Force Sync Cancelling", description=f"The force sync will stop after the current edits. Use `{ctx.prefix}rolesync forcesync resume` to continue it later.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    @rolesync_forcesync.command(name="discard")
+    async def rolesync_forcesync_discard(self, ctx: commands.Context):
+        """Drops the checkpoint of an interrupted force sync, so a new one can be started."""
+        if self.forcesync_run is not None:
+            embed = discord.Embed(title="Error", description=f"A force sync is running. Stop it with `{ctx.prefix}rolesync forcesync cancel` first.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        if not await self.config.forcesync_checkpoint():
+            embed = discord.Embed(title="Error", description="There is no interrupted force sync to discard.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        await self.config.forcesync_checkpoint.clear()
+        embed = discord.Embed(title="Checkpoint Discarded", description="The interrupted force sync's checkpoint was dropped.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    async def _start_forcesync(self, ctx: commands.Context, group_name: Optional[str], resume_after: Dict[int, int]):
         if not await self.config.enabled():
             embed = discord.Embed(title="Error", description=f"Role synchronization is globally disabled. Enable it first with `{ctx.prefix}rolesync toggle`.", color=discord.Color.red())
             await ctx.send(embed=embed)
             return
 
-        embed = discord.Embed(title="Force Sync Started", description="Starting role synchronization from master servers... This may take a while.", color=discord.Color.blue())
+        title = "Force Sync Resumed" if resume_after else "Force Sync Started"
+        embed = discord.Embed(title=title, description="Starting role synchronization from master servers... This may take a while.", color=discord.Color.blue())
         initial_message = await ctx.send(embed=embed)
         all_groups: SyncGroups = await self.config.sync_groups()
         groups_to_sync = {}
@@ -249,13 +427,82 @@ class RoleSyncer(commands.Cog):
             await initial_message.edit(embed=embed)
             return
 
-        processed_users = 0
-        sync_actions = 0
+        if self.forcesync_run is not None:
+            embed = discord.Embed(title="Error", description="A force sync is already running. Wait for it to finish first.", color=discord.Color.red())
+            await initial_message.edit(embed=embed)
+            return
+
+        run = ForceSyncRun(initial_message, group_name, resume_after)
+        self.forcesync_run = run
+        try:
+            checked = await self._plan_forcesync(run, groups_to_sync)
+            await self._save_forcesync_checkpoint(run)
+            run.started = time.monotonic()
+            reporter = asyncio.create_task(self._report_forcesync_progress(run))
+            workers = [
+                asyncio.create_task(self._run_slave_queue(run, slave_guild, entries))
+                for slave_guild, entries in run.queues.items()
+            ]
+            completed = False
+            try:
+                await asyncio.gather(*workers)
+                completed = True
+            finally:
+                # If one worker failed, stop the others before the run is released, so a new
+                # forcesync can't start while they are still editing members.
+                reporter.cancel()
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if not completed or run.cancelled:
+                    await self._save_forcesync_checkpoint(run)
+        finally:
+            if self.forcesync_run is run:
+                self.forcesync_run = None
+
+        if run.cancelled:
+            embed = discord.Embed(
+                title="Force Sync Cancelled",
+                description=(
+                    f"Stopped after **{run.processed}** of **{run.total}** planned member edits (**{run.actions}** role adjustments).\n"
+                    f"Use `{ctx.prefix}rolesync forcesync resume` to continue from here."
+                ),
+                color=discord.Color.orange()
+            )
+            await initial_message.edit(embed=embed)
+            return
+
+        await self.config.forcesync_checkpoint.clear()
+        embed = discord.Embed(
+            title="Force Sync Complete",
+            description=(
+                f"Master->Slave role synchronization complete.\n"
+                f"Checked **{checked}** user instances across master/slave pairs; **{run.total}** needed changes across **{len(run.queues)}** servers.\n"
+                f"Performed **{run.actions}** role adjustments based on configured roles in {self._format_duration(time.monotonic() - run.started)}."
+            ),
+            color=discord.Color.green()
+        )
+        await initial_message.edit(embed=embed)
+
+    async def _save_forcesync_checkpoint(self, run: ForceSyncRun):
+        await self.config.forcesync_checkpoint.set({
+            "group": run.group_name,
+            "slaves": {str(slave_id): member_id for slave_id, member_id in run.last_processed.items()},
+        })
+
+    async def _plan_forcesync(self, run: ForceSyncRun, groups_to_sync: SyncGroups) -> int:
+        """Diffs every master/slave member pair up front and queues one merged edit per slave member.
 
+        Returns how many member pairs were checked. When groups disagree about a role for the same
+        slave member, adding it wins.
+        """
+        checked = 0
+        plans: Dict[discord.Guild, Dict[int, PlannedSync]] = {}
+        role_sets: Dict[Tuple[int, frozenset], Dict[int, frozenset]] = {}
         for g_name, group_data in groups_to_sync.items():
             master_id = group_data.get("master")
             slave_ids = group_data.get("slaves", [])
-            allowed_roles = set(group_data.get("roles", []))
+            allowed_roles = frozenset(group_data.get("roles", []))
 
             if not master_id:
                 log.info(f"Skipping group '{g_name}' in forcesync: No master server set.")
@@ -278,91 +525,256 @@ class RoleSyncer(commands.Cog):
                  log.warning(f"Skipping group '{g_name}' in forcesync: No available slave servers found.")
                  continue
 
-            log.info(f"Forcesync: Processing group '{g_name}' (Master: {master_guild.name})")
-
+            log.info(f"Forcesync: Planning group '{g_name}' (Master: {master_guild.name})")
+
+            for slave_guild in slave_guild_objects:
+                for index, (master_member, slave_member) in enumerate(self._shared_members(master_guild, slave_guild)):
+                    if index % FORCESYNC_PLAN_YIELD_EVERY == 0:
+                        await asyncio.sleep(0)
+                    if master_member.bot: continue
+                    checked += 1
+
+                    relevant_master_roles = self._synced_role_names(role_sets, master_member, allowed_roles)
+                    relevant_slave_roles = self._synced_role_names(role_sets, slave_member, allowed_roles)
+                    if relevant_master_roles == relevant_slave_roles:
+                        continue
+
+                    to_add_slave = relevant_master_roles - relevant_slave_roles
+                    to_remove_slave = relevant_slave_roles - relevant_master_roles
+
+                    guild_plan = plans.setdefault(slave_guild, {})
+                    planned = guild_plan.get(master_member.id)
+                    if planned is None:
+                        guild_plan[master_member.id] = PlannedSync(master_member, set(to_add_slave), set(to_remove_slave), set(allowed_roles))
+                    else:
+                        planned.to_add |= to_add_slave
+                        planned.to_remove |= to_remove_slave
+                        planned.allowed |= allowed_roles
+
+        for slave_guild, guild_plan in plans.items():
+            for planned in guild_plan.values():
+                planned.to_remove -= planned.to_add
+            resume_after = run.last_processed.get(slave_guild.id)
+            queue = [guild_plan[member_id] for member_id in sorted(guild_plan) if resume_after is None or member_id > resume_after]
+            if queue:
+                run.queues[slave_guild] = queue
+                run.total += len(queue)
+        log.info(f"Forcesync: Planned {run.total} member edits across {len(plans)} slave servers from {checked} checked pairs.")
+        return checked
+
+    @staticmethod
+    def _shared_members(master_guild: discord.Guild, slave_guild: discord.Guild):
+        """Yields (master_member, slave_member) for users in both guilds, walking whichever guild is smaller."""
+        if (slave_guild.member_count or 0) < (master_guild.member_count or 0):
+            for slave_member in slave_guild.members:
+                master_member = master_guild.get_member(slave_member.id)
+                if master_member:
+                    yield master_member, slave_member
+        else:
             for master_member in master_guild.members:
-                if master_member.bot: continue
-
-                master_roles_names = {r.name for r in master_member.roles}
-                relevant_master_roles = master_roles_names.intersection(allowed_roles)
-
-                for slave_guild in slave_guild_objects:
-                    slave_member = slave_guild.get_member(master_member.id)
-                    if slave_member:
-                        processed_users += 1
-                        slave_roles_names = {r.name for r in slave_member.roles}
-                        relevant_slave_roles = slave_roles_names.intersection(allowed_roles)
+                slave_member = slave_guild.get_member(master_member.id)
+                if slave_member:
+                    yield master_member, slave_member
+
+    @staticmethod
+    def _synced_role_names(role_sets: Dict[Tuple[int, frozenset], Dict[int, frozenset]], member: discord.Member, allowed_roles: frozenset) -> frozenset:
+        """Returns the member's role names that the group syncs, memoised per guild and role set for one planning pass."""
+        cache = role_sets.setdefault((member.guild.id, allowed_roles), {})
+        names = cache.get(member.id)
+        if names is None:
+            names = frozenset(r.name for r in member.roles if r.name in allowed_roles)
+            cache[member.id] = names
+        return names
+
+    async def _run_slave_queue(self, run: ForceSyncRun, slave_guild: discord.Guild, queue: List[PlannedSync]):
+        """Applies one slave guild's planned edits in order.
+
+        Member edits share a per-guild rate limit bucket, so each guild gets a single worker and
+        discord.py waits out the bucket between requests. The semaphore keeps the number of guilds
+        edited at once, and with it the global request rate, bounded.
+        """
+        async with run.semaphore:
+            for planned in queue:
+                if run.cancelled:
+                    return
+                slave_member = slave_guild.get_member(planned.master_member.id)
+                if slave_member:
+                    log.debug(f"Forcesync: Syncing {planned.master_member} ({planned.master_member.guild.name}) -> {slave_member} ({slave_guild.name}). Add: {planned.to_add}, Remove: {planned.to_remove}")
+                    await self._sync_member_roles(planned.master_member, planned.master_member.guild, slave_member, slave_guild,
+                                                  planned.to_add, planned.to_remove, planned.allowed)
+                    run.actions += len(planned.to_add) + len(planned.to_remove)
+                run.processed += 1
+                run.last_processed[slave_guild.id] = planned.master_member.id
+                if run.processed % FORCESYNC_CHECKPOINT_EVERY == 0:
+                    await self._save_forcesync_checkpoint(run)
+
+    async def _report_forcesync_progress(self, run: ForceSyncRun):
+        """Edits the status message with progress and an ETA, at most once every few seconds."""
+        while True:
+            await asyncio.sleep(FORCESYNC_PROGRESS_INTERVAL_SECONDS)
+            elapsed = time.monotonic() - run.started
+            remaining = run.total - run.processed
+            eta = self._format_duration(elapsed / run.processed * remaining) if run.processed else "calculating..."
+            embed = discord.Embed(
+                title="Force Sync Running",
+                description=(
+                    f"Processed **{run.processed}** of **{run.total}** planned member edits across **{len(run.queues)}** servers.\n"
+                    f"Remaining: **{remaining}**, ETA: **{eta}**\n"
+                    f"Role adjustments so far: **{run.actions}**"
+                ),
+                color=discord.Color.blue()
+            )
+            try:
+                await run.message.edit(embed=embed)
+            except discord.HTTPException as e:
+                log.warning(f"Forcesync: Failed to update progress message: {e}")
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}h {minutes}m"
+        if minutes:
+            return f"{minutes}m {seconds}s"
+        return f"{seconds}s"
+
+    def _roles_by_name(self, guild: discord.Guild) -> Dict[str, discord.Role]:
+        """Returns the guild's role name -> Role index, building it on first use.
+
+        Matches discord.utils.get(guild.roles, name=...): with duplicate names the lowest role wins.
+        """
+        index = self.role_indexes.get(guild.id)
+        if index is None:
+            index = {}
+            for role in guild.roles:
+                index.setdefault(role.name, role)
+            self.role_indexes[guild.id] = index
+        return index
+
+    def _invalidate_role_index(self, role: discord.Role):
+        # Role events are rare next to member updates; dropping the guild's index keeps duplicate names and position changes correct.
+        self.role_indexes.pop(role.guild.id, None)
 
-                        to_add_slave = relevant_master_roles - relevant_slave_roles
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self._invalidate_role_index(role)
 
-                        to_remove_slave = relevant_slave_roles - relevant_master_roles
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name or before.position != after.position:
+            self._invalidate_role_index(after)
 
-                        if to_add_slave or to_remove_slave:
-                            log.debug(f"Forcesync {g_name}: Syncing {master_member} ({master_guild.name}) -> {slave_member} ({slave_guild.name}). Add: {to_add_slave}, Remove: {to_remove_slave}")
-                            await self._sync_member_roles(master_member, master_guild, slave_member, slave_guild, to_add_slave, to_remove_slave, allowed_roles)
-                            sync_actions += len(to_add_slave) + len(to_remove_slave)
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._invalidate_role_index(role)
 
-        embed = discord.Embed(
-            title="Force Sync Complete",
-            description=f"Master->Slave role synchronization complete.\nProcessed **{processed_users}** user instances across master/slave pairs.\nPerformed **{sync_actions}** role adjustments based on configured roles.",
-            color=discord.Color.green()
-        )
-        await initial_message.edit(embed=embed)
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.role_indexes.pop(guild.id, None)
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
-        """Listens for role changes on a master server and syncs to slaves."""
-        if not await self.config.enabled() or before.roles == after.roles or after.bot:
+        """Queues role changes on a master server; the worker syncs them to slaves once they settle."""
+        groups = self.groups_by_master.get(after.guild.id)
+        if not groups or not self.enabled or before.roles == after.roles or after.bot:
             return
 
-        master_guild = after.guild
-        master_member = after
-
-        all_groups: SyncGroups = await self.config.sync_groups()
-        group_data = None
-        group_name = None
-
-        for g_name, g_data in all_groups.items():
-            if g_data.get("master") == master_guild.id:
-                group_data = g_data
-                group_name = g_name
-                break
+        now = time.monotonic()
+        key = (after.guild.id, after.id)
+        pending = self.pending_role_changes.get(key)
+        if pending is None:
+            self.pending_role_changes[key] = PendingRoleChange(frozenset(r.name for r in before.roles), now)
+        else:
+            pending.due = min(now + ROLE_CHANGE_DEBOUNCE_SECONDS, pending.first_seen + ROLE_CHANGE_MAX_DELAY_SECONDS)
+        self.role_change_event.set()
+
+    async def _role_change_worker(self):
+        """Applies queued master role changes once no new change for the member has arrived for the debounce window."""
+        while True:
+            await self.role_change_event.wait()
+            now = time.monotonic()
+            due = [key for key, pending in self.pending_role_changes.items() if pending.due <= now]
+            for key in due:
+                pending = self.pending_role_changes.pop(key)
+                try:
+                    await self._apply_role_change(*key, pending.before_names)
+                except Exception as e:
+                    log.error(f"RoleSync: Unexpected error syncing member {key[1]} from master {key[0]}: {e}", exc_info=True)
+
+            if not self.pending_role_changes:
+                self.role_change_event.clear()
+                continue
+            next_due = min(pending.due for pending in self.pending_role_changes.values())
+            await asyncio.sleep(max(0.0, next_due - time.monotonic()))
 
-        if not group_data or not group_name:
+    async def _flush_role_changes(self):
+        """Applies every queued role change without waiting for its debounce, so unloading doesn't drop them."""
+        pending, self.pending_role_changes = self.pending_role_changes, {}
+        if not pending:
             return
+        applied = 0
+
+        async def apply_all():
+            nonlocal applied
+            for key, change in pending.items():
+                try:
+                    await self._apply_role_change(*key, change.before_names)
+                except Exception as e:
+                    log.error(f"RoleSync: Unexpected error syncing member {key[1]} from master {key[0]}: {e}", exc_info=True)
+                applied += 1
 
-        slave_ids = group_data.get("slaves", [])
-        allowed_roles = set(group_data.get("roles", []))
+        try:
+            await asyncio.wait_for(apply_all(), timeout=ROLE_CHANGE_FLUSH_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            log.warning(f"RoleSync: Dropped {len(pending) - applied} of {len(pending)} queued role changes on unload after {ROLE_CHANGE_FLUSH_TIMEOUT_SECONDS:.0f}s. Run a forcesync to catch the slaves up.")
+        else:
+            log.info(f"RoleSync: Applied {applied} queued role changes on unload.")
 
-        if not slave_ids or not allowed_roles:
+    async def _apply_role_change(self, guild_id: int, member_id: int, before_names: frozenset):
+        """Syncs the net change between the member's roles when first queued and their roles now."""
+        groups = self.groups_by_master.get(guild_id)
+        master_guild = self.bot.get_guild(guild_id)
+        if not groups or not self.enabled or not master_guild:
+            return
+        master_member = master_guild.get_member(member_id)
+        if not master_member:
             return
 
-        before_role_names = {r.name for r in before.roles}
-        after_role_names = {r.name for r in after.roles}
+        before_role_names = before_names
+        after_role_names = {r.name for r in master_member.roles}
 
         added_role_names = after_role_names - before_role_names
         removed_role_names = before_role_names - after_role_names
 
-        relevant_added = added_role_names.intersection(allowed_roles)
-        relevant_removed = removed_role_names.intersection(allowed_roles)
-
-        if not relevant_added and not relevant_removed:
-            return
+        # Several groups may share this master and a slave; merge them so each slave member gets one edit.
+        targets: Dict[int, Tuple[Set[str], Set[str], Set[str], List[str]]] = {}
+        for group in groups:
+            relevant_added = added_role_names.intersection(group.roles)
+            relevant_removed = removed_role_names.intersection(group.roles)
+            if not relevant_added and not relevant_removed:
+                continue
 
-        log.info(f"Detected relevant role change for {master_member} in master server {master_guild.name} (Group: {group_name}). Changes: Add {relevant_added}, Remove {relevant_removed}")
+            log.info(f"Detected relevant role change for {master_member} in master server {master_guild.name} (Group: {group.name}). Changes: Add {relevant_added}, Remove {relevant_removed}")
+            for slave_id in group.slaves:
+                to_add, to_remove, allowed_roles, group_names = targets.setdefault(slave_id, (set(), set(), set(), []))
+                to_add |= relevant_added
+                to_remove |= relevant_removed
+                allowed_roles |= group.roles
+                group_names.append(group.name)
 
-        for slave_id in slave_ids:
+        for slave_id, (to_add, to_remove, allowed_roles, group_names) in targets.items():
             slave_guild = self.bot.get_guild(slave_id)
             if not slave_guild:
-                log.warning(f"Slave guild {slave_id} not found or bot not in it for group {group_name}.")
+                log.warning(f"Slave guild {slave_id} not found or bot not in it for groups {', '.join(group_names)}.")
                 continue
 
             slave_member = slave_guild.get_member(master_member.id)
             if not slave_member:
                 continue
 
-            log.debug(f"Syncing {master_member} ({master_guild.name}) -> {slave_member} ({slave_guild.name}). Add: {relevant_added}, Remove: {relevant_removed}")
-            await self._sync_member_roles(master_member, master_guild, slave_member, slave_guild, relevant_added, relevant_removed, allowed_roles)
+            log.debug(f"Syncing {master_member} ({master_guild.name}) -> {slave_member} ({slave_guild.name}). Add: {to_add}, Remove: {to_remove}")
+            await self._sync_member_roles(master_member, master_guild, slave_member, slave_guild, to_add, to_remove, allowed_roles)
 
     async def _sync_member_roles(self, source_member: discord.Member, source_guild: discord.Guild,
                                  target_member: discord.Member, target_guild: discord.Guild,
@@ -378,9 +790,12 @@ class RoleSyncer(commands.Cog):
         final_roles_to_add = roles_to_add_names
         final_roles_to_remove = roles_to_remove_names
 
+        roles_by_name = self._roles_by_name(target_guild)
+        member_role_ids = {r.id for r in target_member.roles}
+
         for role_name in final_roles_to_add:
-            role = discord.utils.get(target_guild.roles, name=role_name)
-            if role and role not in target_member.roles:
+            role = roles_by_name.get(role_name)
+            if role and role.id not in member_role_ids:
                 if target_guild.me.top_role > role:
                     roles_to_add_target.append(role)
                 else:
@@ -390,14 +805,18 @@ class RoleSyncer(commands.Cog):
 
 
         for role_name in final_roles_to_remove:
-            role = discord.utils.get(target_guild.roles, name=role_name)
-            if role and role in target_member.roles:
+            role = roles_by_name.get(role_name)
+            if role and role.id in member_role_ids:
                 if target_guild.me.top_role > role:
                     roles_to_remove_target.append(role)
                 else:
                     log.warning(f"RoleSync: Cannot remove role '{role.name}' from {target_member} in {target_guild.name} - Bot hierarchy too low.")
 
         try:
+            if self.single_edit and (roles_to_add_target or roles_to_remove_target):
+                await self._edit_member_roles(target_member, roles_to_add_target, roles_to_remove_target, f"RoleSync from master {source_guild.name}")
+                log.info(f"Set roles for {target_member} in slave {target_guild.name}. Added {[r.name for r in roles_to_add_target]}, removed {[r.name for r in roles_to_remove_target]}")
+                return
             if roles_to_add_target:
                 await target_member.add_roles(*roles_to_add_target, reason=f"RoleSync from master {source_guild.name}")
                 log.info(f"Added roles {[r.name for r in roles_to_add_target]} to {target_member} in slave {target_guild.name}")
@@ -408,3 +827,14 @@ class RoleSyncer(commands.Cog):
             log.error(f"RoleSync: Missing permissions to modify roles for {target_member} in {target_guild.name}.")
         except discord.HTTPException as e:
             log.error(f"RoleSync: Failed to modify roles for {target_member} in {target_guild.name}: {e}")
+
+    @staticmethod
+    async def _edit_member_roles(member: discord.Member, to_add: List[discord.Role], to_remove: List[discord.Role], reason: str):
+        """Replaces the member's whole role list in one request: unsynced roles are kept, synced ones swapped.
+
+        The list is built from the cached member, so a role granted elsewhere in the same instant may be overwritten.
+        """
+        removed_ids = {r.id for r in to_remove}
+        roles = [r for r in member.roles if not r.is_default() and r.id not in removed_ids]
+        roles.extend(to_add)
+        await member.edit(roles=roles, reason=reason)